@@ -141,6 +141,40 @@ STATICFILES_DIRS = [    #new
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media/')
 MEDIA_URL = "media/"
 
+# CSV export of registered voters loaded by voter_analytics (manage.py load_voters)
+VOTER_DATA_FILE = os.path.join(BASE_DIR, 'newton_voters.csv')
+
+# how long (in seconds) voter_analytics caches the voter data version,
+# and the number of results of a search
+VOTER_DATA_VERSION_TTL = 10
+VOTER_COUNT_CACHE_TTL = 60 * 60
+
+# voter_analytics caches the primary keys matching a search for this many
+# seconds, as long as there are no more than VOTER_RESULT_CACHE_MAX_IDS
+VOTER_RESULT_CACHE_TTL = 5 * 60
+VOTER_RESULT_CACHE_MAX_IDS = 10000
+
+# how long (in seconds) voter_analytics caches the figures of the graphs page
+VOTER_FIGURE_CACHE_TTL = 60 * 60
+
+# seconds a rendered voter detail page is kept (a new voter file makes
+# the cached pages unreachable anyway)
+VOTER_DETAIL_CACHE_TTL = 60 * 60
+
+# answer voter searches from an in-memory NumPy copy of the Voter table
+# (needs numpy; loaded on first use and again after each voter file load)
+VOTER_COLUMNAR_ENGINE = False
+
+# the most matches of a name/address text search (the q parameter) the
+# voter list shows, best first (the search itself finds them all)
+VOTER_TEXT_SEARCH_LIMIT = 1000
+
+# voters in the random sample drawn at every load (spread over the
+# precincts), and the estimated number of matches above which the graphs
+# of a search the summary cube can't answer are estimated from the sample
+VOTER_SAMPLE_SIZE = 20_000
+VOTER_SAMPLE_THRESHOLD = 100_000
+
 import socket
 CS_DEPLOYMENT_HOSTNAME = 'cs-webapps.bu.edu'
 
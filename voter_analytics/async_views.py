@@ -0,0 +1,115 @@
+# voter_analytics/async_views.py
+# Made by Annelise Schreiber, aschreib@bu.edu
+# Sunday, October 18, 2026
+# Description: async versions of the voter list, detail and graphs views.
+# Under ASGI they wait for the database without holding on to a thread
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.http import Http404, HttpResponse
+from django.shortcuts import render
+from django.views.generic import View
+
+from .charts import (PLOTLY_JS, PLOTLY_TEMPLATE_JS, asearch_chart_series, chart_figures,
+                     figures_cache_key)
+from .counts import asearch_count
+from .dataversion import data_version
+from .filters import VoterSearch
+from .fulltext import ranked_pks
+from .lookups import LOOKUP_FIELDS
+from .models import Voter
+from .pagination import akeyset_page
+from .views import (detail_cache_key, filter_query, household_members, registration_chart,
+                    search_form_context)
+
+
+class AsyncVoterRecordsView(View):
+    '''VoterRecordsListView as an async view, with keyset pages fetched by
+    the async ORM (text searches get numbered pages, best match first).'''
+
+    template_name = 'voter_analytics/voter_records.html'
+    paginate_by = 100
+
+    async def get(self, request):
+        search = VoterSearch(request.GET)
+        # building the Q object may run a full-text search query
+        queryset = Voter.objects.select_related(*LOOKUP_FIELDS).filter(await sync_to_async(search.q)())
+
+        ranked = None
+        if search.uses('q'):
+            ranked = await sync_to_async(ranked_pks)(queryset, search.values['q'])
+
+        if ranked is not None:
+            paginator = Paginator(ranked, self.paginate_by)
+            page = paginator.get_page(request.GET.get('page'))
+            voters = await queryset.ain_bulk(page.object_list)
+            page.object_list = [voters[pk] for pk in page.object_list]
+        else:
+            paginator = None
+            page = await akeyset_page(queryset, request.GET.get('cursor'), self.paginate_by)
+            if request.GET.get('count'):
+                estimate = request.GET['count'] == 'estimate'
+                page.count, page.count_estimated = await asearch_count(queryset, search, estimate)
+
+        context = search_form_context(request.GET)
+        context.update({
+            'results': page.object_list,
+            'page_obj': page,
+            'paginator': paginator,
+            'is_paginated': page.has_other_pages(),
+            'keyset': paginator is None,
+            'filter_query': filter_query(request.GET),
+        })
+        return render(request, self.template_name, context)
+
+
+class AsyncVoterDetailView(View):
+    '''VoterDetailView as an async view.'''
+
+    template_name = 'voter_analytics/record_detail.html'
+
+    async def get(self, request, pk):
+        # the same page cache as VoterDetailView
+        version, loaded_at = await sync_to_async(data_version)()
+        cache_key = detail_cache_key(version, pk)
+        content = await cache.aget(cache_key)
+        if content is not None:
+            return HttpResponse(content)
+
+        try:
+            voter = await Voter.objects.select_related(*LOOKUP_FIELDS).aget(pk=pk)
+        except Voter.DoesNotExist:
+            raise Http404("No voter found matching the query")
+        household = [other async for other in household_members(voter.household_key).exclude(pk=pk)]
+
+        response = render(request, self.template_name, {'r': voter, 'household': household})
+        await cache.aset(cache_key, response.content, settings.VOTER_DETAIL_CACHE_TTL)
+        return response
+
+
+class AsyncGraphsView(View):
+    '''GraphsView as an async view: the chart queries are awaited instead
+    of holding a worker thread, and the figures share GraphsView's cache.'''
+
+    template_name = 'voter_analytics/graphs.html'
+
+    async def get(self, request):
+        search = VoterSearch(request.GET)
+
+        version, loaded_at = await sync_to_async(data_version)()
+        cache_key = figures_cache_key(version, search)
+        figures = await cache.aget(cache_key)
+
+        if figures is None:
+            series = await asearch_chart_series(search)
+            # building plotly figures is plain CPU work, so it can go to any thread
+            figures = await sync_to_async(chart_figures, thread_sensitive=False)(series)
+            await cache.aset(cache_key, figures, settings.VOTER_FIGURE_CACHE_TTL)
+
+        context = search_form_context(request.GET)
+        context.update({'figures': figures, 'plotly_js': PLOTLY_JS,
+                        'plotly_template_js': PLOTLY_TEMPLATE_JS,
+                        'registration_chart': registration_chart(search)})
+        return render(request, self.template_name, context)
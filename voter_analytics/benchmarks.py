@@ -0,0 +1,102 @@
+# voter_analytics/benchmarks.py
+# Made by Annelise Schreiber, aschreib@bu.edu
+# Sunday, October 18, 2026
+# Description: helpers shared by the voter_analytics benchmark commands
+
+import asyncio
+import io
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test import RequestFactory
+
+from .ingest import DEFAULT_BATCH_SIZE, batched
+from .lookups import LookupCodes
+from .models import Voter
+from .synthetic import generate_rows
+from .voter_csv import parse_row
+
+
+@contextmanager
+def test_database():
+    '''Run the block against a throwaway test database (like manage.py test
+    does), so benchmarks never touch the real voter data.'''
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def load_synthetic(count, seed=412, batch_size=DEFAULT_BATCH_SIZE):
+    '''Fill the Voter table with `count` made-up voters.'''
+    rows = (parse_row(fields) for fields in generate_rows(count, seed))
+    codes = LookupCodes()
+    for batch in batched(rows, batch_size):
+        Voter.objects.bulk_create([Voter(**fields) for fields in codes.encode(batch)],
+                                  batch_size=batch_size)
+
+
+def view_queryset(view_class, params):
+    '''The queryset a view would build for a GET request with these parameters.'''
+    view = view_class()
+    view.setup(RequestFactory().get('/', params))
+    return view.get_queryset()
+
+
+def time_call(func, repeat=5):
+    '''Call func `repeat` times and return the median time in milliseconds.'''
+    timings = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def wsgi_get(application, path, query=''):
+    '''Send a GET request straight to a WSGI application (no server) and
+    return the response status code.'''
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query,
+        'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+        'wsgi.version': (1, 0), 'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(),
+        'wsgi.errors': io.StringIO(), 'wsgi.multithread': True, 'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    status = []
+    body = application(environ, lambda code, headers, exc_info=None: status.append(code))
+    for chunk in body:
+        pass
+    body.close()
+    return int(status[0].split()[0])
+
+
+async def asgi_get(application, path, query=''):
+    '''Send a GET request straight to an ASGI application (no server) and
+    return the response status code.'''
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+        'root_path': '', 'query_string': query.encode(), 'headers': [(b'host', b'localhost')],
+        'server': ('localhost', 80), 'client': ('127.0.0.1', 0),
+    }
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await asyncio.Event().wait() # the client never goes away
+
+    status = []
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    await application(scope, receive, send)
+    return status[0]
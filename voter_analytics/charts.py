@@ -0,0 +1,278 @@
+# voter_analytics/charts.py
+# Made by Annelise Schreiber, aschreib@bu.edu
+# Sunday, October 18, 2026
+# Description: computing the data behind the voter_analytics graphs with
+# grouped aggregates in the database, and turning it into plotly figures
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+from django.db.models.functions import ExtractYear
+
+# Import plotly library for graphing
+import plotly.graph_objs as go
+
+from .columnar import columnar_engine
+from .dataversion import data_version
+from .lookups import decode_keys
+from .models import Voter, VoterSummary
+from .sampling import sampled_chart_series
+from .summary import summary_queryset
+from .voter_csv import ELECTION_FIELDS, PARTICIPATION_PATTERNS
+
+# the copy of plotly.js in static/ that draws the figures in the browser.
+# The version is in the file name, so it can be cached forever
+PLOTLY_JS = 'voter_analytics/js/plotly-4.1.1.min.js'
+
+# plotly.py's default figure template, written out once from
+# plotly.io.templates['plotly'] (the version is plotly.py's): the figures
+# leave it out of their JSON and the page applies this copy to all of them
+PLOTLY_TEMPLATE_JS = 'voter_analytics/js/plotly-template-7.1.0.js'
+
+# the series chart_series returns
+CHART_SERIES = ['birth_year', 'party', 'elections', 'participation']
+
+
+def voted_in(election, weight):
+    '''Aggregate counting the voters who took part in one election.'''
+    return Sum(Case(When(**{election: True}, then=weight), default=0, output_field=IntegerField()))
+
+
+def year_and_weight(results):
+    '''The birth year of a Voter or VoterSummary row, and how many voters
+    the row stands for.'''
+    if results.model is VoterSummary:
+        # each cube row stands for `count` voters
+        return F('birth_year'), F('count')
+    return ExtractYear('dob'), Value(1)
+
+
+def participation_of(results):
+    '''The participation bitmask of a Voter or VoterSummary row (the cube
+    has the five flags, so their bits are added up).'''
+    if results.model is VoterSummary:
+        bits = [Case(When(**{election: True}, then=Value(1 << bit)), default=Value(0))
+                for bit, election in enumerate(ELECTION_FIELDS)]
+        return sum(bits[1:], bits[0])
+    return F('participation')
+
+
+def voter_score_of(results):
+    '''The voter score of a Voter or VoterSummary row (the cube has the five
+    flags, and the score is how many of them are set).'''
+    if results.model is VoterSummary:
+        votes = [Case(When(**{election: True}, then=Value(1)), default=Value(0))
+                 for election in ELECTION_FIELDS]
+        return sum(votes[1:], votes[0])
+    return F('voter_score')
+
+
+def participation_counts(counts):
+    '''{bitmask: voters} with all PARTICIPATION_PATTERNS patterns, in order.'''
+    return {mask: counts.get(mask) or 0 for mask in range(PARTICIPATION_PATTERNS)}
+
+
+def chart_queries(results):
+    '''The two grouped queries behind chart_series: voters per (party, birth
+    year) with the turnout in each election, and voters per participation
+    pattern.'''
+    year, weight = year_and_weight(results)
+    groups = (results.order_by()
+                     .values('party_aff', year=year)
+                     .annotate(voters=Sum(weight),
+                               **{election: voted_in(election, weight) for election in ELECTION_FIELDS}))
+    patterns = (results.order_by()
+                       .values(pattern=participation_of(results))
+                       .annotate(voters=Sum(weight)))
+    return groups, patterns
+
+
+def series_from_rows(groups, patterns):
+    '''Add up the rows of the two chart_queries into the chart series.'''
+    birth_year_counts = {}
+    party_counts = {}
+    election_counts = dict.fromkeys(ELECTION_FIELDS, 0)
+
+    for group in groups:
+        year = group['year']
+        party = group['party_aff']
+        birth_year_counts[year] = birth_year_counts.get(year, 0) + group['voters']
+        party_counts[party] = party_counts.get(party, 0) + group['voters']
+        for election in ELECTION_FIELDS:
+            election_counts[election] += group[election]
+
+    return {
+        'birth_year': dict(sorted(birth_year_counts.items())),
+        'party': decode_keys('party_aff', party_counts),
+        'elections': election_counts,
+        'participation': participation_counts({row['pattern']: row['voters'] for row in patterns}),
+    }
+
+
+def chart_series(results):
+    '''Count a Voter (or VoterSummary) queryset by birth year, by party
+    affiliation and by election participation, all in one grouped query,
+    and by participation pattern (which elections, as a bitmask) in another.
+
+    Returns a dict of {'birth_year': {year: count}, 'party': {party: count},
+    'elections': {election: count}, 'participation': {bitmask: count}}.
+    Only one row per (birth year, party) and per pattern comes back from
+    the database, however many voters match.'''
+    groups, patterns = chart_queries(results)
+    return series_from_rows(groups, patterns)
+
+
+def series_cache_key(version, search):
+    '''Where the chart series of a search are cached.'''
+    return f'voter_analytics:series:{version}:{search.key}'
+
+
+def figures_cache_key(version, search):
+    '''Where the plotly figures of a search are cached.'''
+    return f'voter_analytics:figures:{version}:{search.key}'
+
+
+def search_chart_series(search):
+    '''chart_series for the voters matching a VoterSearch. Answered from the
+    columnar engine when it is turned on; otherwise cached per search and
+    voter data version, adding up the precomputed VoterSummary counts when
+    the search allows it, estimating from the voter sample when it matches
+    most voters (see sampling.sampled_chart_series), or reusing the primary
+    keys cached by the voter list, and only going to the whole Voter table
+    otherwise.'''
+
+    engine = columnar_engine()
+    if engine is not None:
+        series = engine.chart_series(search)
+        if series is not None:
+            return series
+
+    version, loaded_at = data_version()
+    cache_key = series_cache_key(version, search)
+
+    series = cache.get(cache_key)
+    if series is None:
+        # the birth year chart needs the citywide rows
+        results = summary_queryset(search, by_birth_year=True)
+        if results is None:
+            # very broad searches are estimated from the voter sample
+            series = sampled_chart_series(search)
+        if series is None:
+            if results is None:
+                pks = search.matching_pks()
+                if pks is not None:
+                    results = Voter.objects.filter(pk__in=pks)
+                else:
+                    results = Voter.objects.filter(search.q())
+            series = chart_series(results)
+        cache.set(cache_key, series, settings.VOTER_FIGURE_CACHE_TTL)
+    return series
+
+
+async def achart_series(results):
+    '''chart_series for async views: the same two grouped queries, read
+    with the async ORM. (Django runs them one after the other on its
+    database thread, so splitting them up would only add queries.)'''
+    groups, patterns = chart_queries(results)
+    group_rows = [group async for group in groups]
+    pattern_rows = [row async for row in patterns]
+    # decoding the party ids may read a new lookup row
+    return await sync_to_async(series_from_rows)(group_rows, pattern_rows)
+
+
+async def asearch_chart_series(search):
+    '''search_chart_series for async views, sharing its cache.'''
+
+    version, loaded_at = await sync_to_async(data_version)()
+    cache_key = series_cache_key(version, search)
+
+    series = await cache.aget(cache_key)
+    if series is None:
+        results = summary_queryset(search, by_birth_year=True)
+        if results is None:
+            series = await sync_to_async(sampled_chart_series)(search)
+        if series is None:
+            if results is None:
+                # building the Q object may run a full-text search query
+                results = Voter.objects.filter(await sync_to_async(search.q)())
+            series = await achart_series(results)
+        await cache.aset(cache_key, series, settings.VOTER_FIGURE_CACHE_TTL)
+    return series
+
+
+def pattern_label(mask):
+    '''The elections in a participation bitmask, like 'v20state + v22general'.'''
+    voted = [election for bit, election in enumerate(ELECTION_FIELDS) if mask & (1 << bit)]
+    return ' + '.join(voted) or 'none'
+
+
+def error_bars(series, name):
+    '''Plotly error bars for the 95% intervals of an estimated series (None
+    for exact counts).'''
+    if not series.get('approximate'):
+        return None
+    intervals = series['intervals'][name]
+    return {'type': 'data', 'symmetric': False,
+            'array': [intervals[key][1] - count for key, count in series[name].items()],
+            'arrayminus': [count - intervals[key][0] for key, count in series[name].items()]}
+
+
+def figure_json(figure):
+    '''A plotly figure as a plain dict for Plotly.newPlot, without the
+    template (about 7KB of every figure), which PLOTLY_TEMPLATE_JS provides.'''
+    data = figure.to_plotly_json()
+    data['layout'].pop('template', None)
+    return data
+
+
+def chart_figures(series):
+    '''Turn the result of chart_series into plotly figures, as plain dicts
+    that can be sent to the browser as JSON for Plotly.newPlot. Estimated
+    series say so in their titles and show their confidence intervals.'''
+
+    note = ''
+    if series.get('approximate'):
+        note = f" (estimated from {series['sampled']:,} sampled voters, 95% intervals)"
+
+    # 1. Histogram: Distribution of Voters by Birth Year
+    x = list(series['birth_year'].keys())
+    y = list(series['birth_year'].values())
+
+    fig_birth_year = go.Figure(data=[go.Bar(x=x, y=y, name='Voters by Birth Year',
+                                            error_y=error_bars(series, 'birth_year'))],
+                               layout={'title': 'Distribution of Voters by Birth Year' + note})
+
+    # 2. Pie Chart: Distribution of Voters by Party Affiliation
+    labels = list(series['party'].keys())
+    values = list(series['party'].values())
+
+    fig_party_affiliation = go.Figure(data=[go.Pie(labels=labels, values=values,
+                                                   name='Voters by Party Affiliation')],
+                                      layout={'title': 'Distribution of Voters by Party Affiliation' + note})
+
+    # 3. Histogram: Distribution of Voters by Election Participation
+    x_elections = list(series['elections'].keys())
+    y_elections = list(series['elections'].values())
+
+    fig_election_participation = go.Figure(data=[go.Bar(x=x_elections, y=y_elections,
+                                                        name='Voter Participation in Elections',
+                                                        error_y=error_bars(series, 'elections'))],
+                                           layout={'title': 'Distribution of Voters by Election Participation' + note})
+
+    # 4. Bar chart: Voters by Participation Pattern (all 32 combinations)
+    x_patterns = [pattern_label(mask) for mask in series['participation']]
+    y_patterns = list(series['participation'].values())
+
+    fig_participation_pattern = go.Figure(data=[go.Bar(x=x_patterns, y=y_patterns,
+                                                       name='Voters by Participation Pattern',
+                                                       error_y=error_bars(series, 'participation'))],
+                                          layout={'title': 'Voters by Participation Pattern' + note,
+                                                  'xaxis': {'tickangle': -45}})
+
+    return {
+        'birth_year': figure_json(fig_birth_year),
+        'party_affiliation': figure_json(fig_party_affiliation),
+        'election_participation': figure_json(fig_election_participation),
+        'participation_pattern': figure_json(fig_participation_pattern),
+    }
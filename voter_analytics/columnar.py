@@ -0,0 +1,166 @@
+# voter_analytics/columnar.py
+# Made by Annelise Schreiber, aschreib@bu.edu
+# Sunday, October 18, 2026
+# Description: optional in-memory columnar copy of the Voter table, which
+# answers searches, counts and chart data with vectorized NumPy masks
+
+import threading
+from datetime import date
+
+from django.conf import settings
+
+from .dataversion import data_version
+from .filters import MAIN_PARTIES, matching_masks
+from .fulltext import text_search_available, text_search_q
+from .lookups import ENCODED_FIELDS
+from .models import Voter
+from .voter_csv import ELECTION_FIELDS, PARTICIPATION_PATTERNS
+
+# NumPy is optional: without it everything goes through the ORM
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# text columns are stored as small integer codes into a list of values;
+# the columns the database already dictionary-encodes keep its lookup ids
+TEXT_COLUMNS = ['first_name', 'last_name', 'apt_num']
+ENCODED_COLUMNS = list(ENCODED_FIELDS)
+INT_COLUMNS = ['street_num', 'voter_score']
+
+
+class ColumnarVoters:
+    '''Every Voter as NumPy arrays, one per column, in primary key order.
+    Text is dictionary-encoded, dates are day numbers, and the five
+    election flags are bits of one small integer per voter.'''
+
+    def __init__(self, version):
+        self.version = version
+
+        fields = ['pk', *TEXT_COLUMNS, *ENCODED_COLUMNS, *INT_COLUMNS, 'dob', 'participation']
+        rows = Voter.objects.order_by('pk').values_list(*fields).iterator(chunk_size=10000)
+        columns = list(zip(*rows)) or [()] * len(fields)
+        values = dict(zip(fields, columns))
+
+        self.pk = np.array(values['pk'], dtype=np.int64)
+
+        # dictionary encoding: codes[i] is the position of row i's value in vocab
+        self.codes = {}
+        self.vocab = {}
+        self.lookup = {}
+        for name in TEXT_COLUMNS:
+            vocab, codes = np.unique(np.array([value or '' for value in values[name]], dtype=object),
+                                     return_inverse=True)
+            self.vocab[name] = list(vocab)
+            self.codes[name] = codes.astype(np.int32)
+            self.lookup[name] = {value: code for code, value in enumerate(vocab)}
+        for name in ENCODED_COLUMNS:
+            model, value_field = ENCODED_FIELDS[name]
+            self.vocab[name] = dict(model.objects.values_list('id', value_field))
+            self.codes[name] = np.array(values[name], dtype=np.int32)
+            self.lookup[name] = {value: code for code, value in self.vocab[name].items()}
+
+        self.ints = {name: np.array(values[name], dtype=np.int32) for name in INT_COLUMNS}
+
+        self.dob = np.array([dob.toordinal() for dob in values['dob']], dtype=np.int32)
+        self.birth_year = np.array([dob.year for dob in values['dob']], dtype=np.int16)
+
+        # bit i is set if the voter took part in ELECTION_FIELDS[i]
+        self.elections = np.array(values['participation'], dtype=np.uint8)
+
+    def text_mask(self, name, value):
+        '''Rows whose text (or dictionary-encoded) column equals value.'''
+        code = self.lookup[name].get(value)
+        if code is None:
+            return np.zeros(len(self.pk), dtype=bool)
+        return self.codes[name] == code
+
+    def filter_mask(self, name, value):
+        '''Rows matching one cleaned search parameter, or None if the engine
+        doesn't know this parameter.'''
+        if name == 'party_aff' and value == 'not_rdu':
+            main = [self.lookup['party_aff'][party] for party in MAIN_PARTIES
+                    if party in self.lookup['party_aff']]
+            return ~np.isin(self.codes['party_aff'], main)
+        if name in TEXT_COLUMNS or name in ENCODED_COLUMNS:
+            return self.text_mask(name, value)
+        if name in INT_COLUMNS:
+            return self.ints[name] == value
+        if name == 'dob':
+            return self.dob == value.toordinal()
+        if name == 'min_dob':
+            return self.dob >= date(value, 1, 1).toordinal()
+        if name == 'max_dob':
+            return self.dob <= date(value, 12, 31).toordinal()
+        if name == 'q':
+            if not text_search_available():
+                return None
+            pks = Voter.objects.filter(text_search_q(value)).values_list('pk', flat=True)
+            return np.isin(self.pk, np.fromiter(pks, dtype=np.int64))
+        if name in ELECTION_FIELDS:
+            voted = (self.elections & (1 << ELECTION_FIELDS.index(name))) != 0
+            return voted if value == 'on' else ~voted
+        if name in ('voted_exactly', 'voted_at_least'):
+            return np.isin(self.elections, matching_masks(value, name == 'voted_exactly'))
+        return None
+
+    def mask(self, search):
+        '''Boolean array of the rows matching a VoterSearch, or None if the
+        search uses a parameter the engine can't handle.'''
+        combined = np.ones(len(self.pk), dtype=bool)
+        for name, value in search.values.items():
+            mask = self.filter_mask(name, value)
+            if mask is None:
+                return None
+            combined &= mask
+        return combined
+
+    def count(self, search):
+        '''Number of matching voters, or None if the engine can't tell.'''
+        mask = self.mask(search)
+        return None if mask is None else int(np.count_nonzero(mask))
+
+    def matching_pks(self, search):
+        '''Sorted primary keys of the matching voters (a NumPy array), or None.'''
+        mask = self.mask(search)
+        return None if mask is None else self.pk[mask]
+
+    def chart_series(self, search):
+        '''Same result as charts.chart_series for a VoterSearch, or None.'''
+        mask = self.mask(search)
+        if mask is None:
+            return None
+
+        years, year_counts = np.unique(self.birth_year[mask], return_counts=True)
+        party_counts = np.bincount(self.codes['party_aff'][mask])
+        elections = self.elections[mask]
+
+        return {
+            'birth_year': {int(year): int(n) for year, n in zip(years, year_counts)},
+            'party': {self.vocab['party_aff'][code]: int(n)
+                      for code, n in enumerate(party_counts) if n},
+            'elections': {election: int(np.count_nonzero(elections & (1 << bit)))
+                          for bit, election in enumerate(ELECTION_FIELDS)},
+            'participation': dict(enumerate(
+                np.bincount(elections, minlength=PARTICIPATION_PATTERNS).tolist())),
+        }
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def columnar_engine():
+    '''The ColumnarVoters for the current voter data, or None when the engine
+    is turned off (settings.VOTER_COLUMNAR_ENGINE) or NumPy isn't installed.
+    It is loaded on first use and again after a new voter file is loaded.'''
+
+    global _engine
+    if np is None or not settings.VOTER_COLUMNAR_ENGINE:
+        return None
+
+    version, loaded_at = data_version()
+    with _engine_lock:
+        if _engine is None or _engine.version != version:
+            _engine = ColumnarVoters(version)
+        return _engine
@@ -0,0 +1,158 @@
+# voter_analytics/counts.py
+# Made by Annelise Schreiber, aschreib@bu.edu
+# Sunday, October 18, 2026
+# Description: cached and estimated result counts for voter searches
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+
+from .columnar import columnar_engine
+from .dataversion import data_version
+from .lookups import lookup_values
+from .models import VoterSummary
+from .summary import summary_queryset
+
+# searches the estimate can handle: anything the citywide cube answers,
+# plus zip code and precinct
+AREA_PARAMS = {'zip_code', 'precinct_num'}
+
+
+def exact_count(queryset, search):
+    '''Count the voters in queryset, which matches a VoterSearch. Uses the
+    columnar engine when it is on, then VoterSummary rows when the search
+    allows it, then the cached matching primary keys, and finally COUNT(*).'''
+    engine = columnar_engine()
+    if engine is not None:
+        count = engine.count(search)
+        if count is not None:
+            return count
+    summary = summary_queryset(search)
+    if summary is not None:
+        return summary.aggregate(total=Sum('count'))['total'] or 0
+    pks = search.matching_pks()
+    if pks is not None:
+        return len(pks)
+    return queryset.count()
+
+
+def count_cache_key(version, search):
+    '''Where the exact count of a search is cached.'''
+    return f'voter_analytics:count:{version}:{search.key}'
+
+
+def cached_count(queryset, search):
+    '''exact_count, remembered per search and voter data version.'''
+    version, loaded_at = data_version()
+    key = count_cache_key(version, search)
+
+    count = cache.get(key)
+    if count is None:
+        count = exact_count(queryset, search)
+        cache.set(key, count, settings.VOTER_COUNT_CACHE_TTL)
+    return count
+
+
+def area_statistics():
+    '''Voter counts per zip code, per precinct and per (zip code, precinct),
+    taken from VoterSummary and cached per voter data version.'''
+    version, loaded_at = data_version()
+    key = f'voter_analytics:area_stats:{version}'
+
+    stats = cache.get(key)
+    if stats is None:
+        rows = (VoterSummary.objects.filter(zip_code__isnull=False)
+                                    .values('zip_code', 'precinct_num')
+                                    .annotate(voters=Sum('count')))
+        zip_codes, precincts = lookup_values('zip_code'), lookup_values('precinct_num')
+        stats = {'total': 0, 'zip_code': {}, 'precinct_num': {}, 'both': {}}
+        for row in rows:
+            zip_code, precinct = str(zip_codes[row['zip_code']]), precincts[row['precinct_num']]
+            stats['total'] += row['voters']
+            stats['zip_code'][zip_code] = stats['zip_code'].get(zip_code, 0) + row['voters']
+            stats['precinct_num'][precinct] = stats['precinct_num'].get(precinct, 0) + row['voters']
+            stats['both'][(zip_code, precinct)] = row['voters']
+        cache.set(key, stats, settings.VOTER_COUNT_CACHE_TTL)
+    return stats
+
+
+def estimate_count(search):
+    '''Estimate the number of voters matching a broad search that filters
+    by zip code and/or precinct, or return None if the search can't be
+    estimated. The rest of the search is counted exactly from the small
+    citywide VoterSummary rows, then scaled by the area's share of all
+    voters, assuming the area is independent of the other filters.'''
+
+    if not search.uses(*AREA_PARAMS):
+        return None
+
+    citywide = summary_queryset(search.without(*AREA_PARAMS))
+    if citywide is None:
+        return None
+    count = citywide.aggregate(total=Sum('count'))['total'] or 0
+
+    stats = area_statistics()
+    if not stats['total']:
+        return 0
+    zip_code = str(search.values.get('zip_code'))
+    precinct = search.values.get('precinct_num')
+    if search.uses('zip_code') and search.uses('precinct_num'):
+        voters = stats['both'].get((zip_code, precinct), 0)
+    elif search.uses('zip_code'):
+        voters = stats['zip_code'].get(zip_code, 0)
+    else:
+        voters = stats['precinct_num'].get(precinct, 0)
+    return round(count * voters / stats['total'])
+
+
+def known_count(search):
+    '''The number of voters matching a VoterSearch if it can be had without
+    reading Voter: the cached exact count, the cube's count, or else the
+    estimate for a search by area. None if there is none of those.'''
+    version, loaded_at = data_version()
+    count = cache.get(count_cache_key(version, search))
+    if count is None:
+        summary = summary_queryset(search)
+        if summary is not None:
+            count = summary.aggregate(total=Sum('count'))['total'] or 0
+    if count is None:
+        count = estimate_count(search)
+    return count
+
+
+def search_count(queryset, search, estimate=False):
+    '''Return (count, estimated) for a VoterSearch: an estimate if one was
+    asked for and the search allows it, otherwise the cached exact count
+    (which is already cheap for searches the citywide cube answers).'''
+    if estimate:
+        count = estimate_count(search)
+        if count is not None:
+            return count, True
+    return cached_count(queryset, search), False
+
+
+async def acached_count(queryset, search):
+    '''cached_count for async views, sharing its cache. Counts with the
+    async ORM: from VoterSummary when the search allows it, else COUNT(*).'''
+    version, loaded_at = await sync_to_async(data_version)()
+    key = count_cache_key(version, search)
+
+    count = await cache.aget(key)
+    if count is None:
+        summary = summary_queryset(search)
+        if summary is not None:
+            count = (await summary.aaggregate(total=Sum('count')))['total'] or 0
+        else:
+            count = await queryset.acount()
+        await cache.aset(key, count, settings.VOTER_COUNT_CACHE_TTL)
+    return count
+
+
+async def asearch_count(queryset, search, estimate=False):
+    '''search_count for async views.'''
+    if estimate:
+        count = await sync_to_async(estimate_count)(search)
+        if count is not None:
+            return count, True
+    return await acached_count(queryset, search), False
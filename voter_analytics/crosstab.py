@@ -0,0 +1,94 @@
+# voter_analytics/crosstab.py
+# Made by Annelise Schreiber, aschreib@bu.edu
+# Sunday, October 18, 2026
+# Description: turnout cross-tabs: voter counts and turnout rates grouped by
+# two or three of party, birth decade, zip code, precinct and voter score
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Sum
+
+from .charts import voted_in, voter_score_of, year_and_weight
+from .dataversion import data_version
+from .lookups import ENCODED_FIELDS, lookup_values
+from .models import Voter
+from .summary import summary_queryset
+from .voter_csv import ELECTION_FIELDS
+
+# the dimensions a cross-tab can group by, and the Voter field behind each
+# (the birth decade is worked out from the birth year, and the cube's voter
+# score from its election flags)
+CROSSTAB_DIMENSIONS = {
+    'party': 'party_aff',
+    'decade': None,
+    'zip': 'zip_code',
+    'precinct': 'precinct_num',
+    'score': 'voter_score',
+}
+
+# dimensions that need the per-area rows of the VoterSummary cube
+AREA_DIMENSIONS = {'zip', 'precinct'}
+
+
+def parse_dimensions(value):
+    '''Turn a comma separated list like 'party,decade' into a list of two or
+    three distinct dimension names. Raises ValueError for anything else.'''
+    dimensions = [name.strip() for name in value.split(',') if name.strip()]
+    if not 2 <= len(dimensions) <= 3 or len(set(dimensions)) != len(dimensions):
+        raise ValueError('choose two or three different dimensions')
+    for name in dimensions:
+        if name not in CROSSTAB_DIMENSIONS:
+            raise ValueError(f'no dimension called {name}')
+    return dimensions
+
+
+def crosstab(results, dimensions):
+    '''Group a Voter (or VoterSummary) queryset by the dimensions in one
+    query. Returns a list of cells like {'party': 'D ', 'decade': 1960,
+    'voters': 1234, 'turnout': {'v20state': 0.81, ...}}, sorted by the
+    dimensions. Turnout is the share of the cell's voters who voted.'''
+
+    year, weight = year_and_weight(results)
+    expressions = {'decade': (year / 10) * 10, 'score': voter_score_of(results)}
+    groups = {name: expressions[name] if name in expressions else F(CROSSTAB_DIMENSIONS[name])
+              for name in dimensions}
+
+    rows = (results.order_by()
+                   .values(**groups)
+                   .annotate(voters=Sum(weight),
+                             **{election: voted_in(election, weight) for election in ELECTION_FIELDS}))
+
+    # party, zip code and precinct come back as lookup ids
+    values = {name: lookup_values(CROSSTAB_DIMENSIONS[name]) for name in dimensions
+              if CROSSTAB_DIMENSIONS[name] in ENCODED_FIELDS}
+
+    cells = []
+    for row in rows:
+        cell = {name: values[name][row[name]] if name in values else row[name]
+                for name in dimensions}
+        cell['voters'] = row['voters']
+        cell['turnout'] = {election: round(row[election] / row['voters'], 4)
+                           for election in ELECTION_FIELDS}
+        cells.append(cell)
+    # sorted by value, not by id
+    cells.sort(key=lambda cell: [cell[name] for name in dimensions])
+    return cells
+
+
+def search_crosstab(search, dimensions):
+    '''crosstab for the voters matching a VoterSearch, cached per search and
+    voter data version. Adds up VoterSummary rows when the search allows
+    it, which is most of the time, and only goes to Voter otherwise.'''
+
+    version, loaded_at = data_version()
+    cache_key = f'voter_analytics:crosstab:{version}:{search.key}:{",".join(dimensions)}'
+
+    cells = cache.get(cache_key)
+    if cells is None:
+        results = summary_queryset(search, by_area=bool(AREA_DIMENSIONS & set(dimensions)),
+                                   by_birth_year='decade' in dimensions)
+        if results is None:
+            results = Voter.objects.filter(search.q())
+        cells = crosstab(results, dimensions)
+        cache.set(cache_key, cells, settings.VOTER_FIGURE_CACHE_TTL)
+    return cells
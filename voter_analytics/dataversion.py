@@ -0,0 +1,83 @@
+# voter_analytics/dataversion.py
+# Made by Annelise Schreiber, aschreib@bu.edu
+# Sunday, October 18, 2026
+# Description: the version stamp of the loaded voter data, used to
+# invalidate everything we cache about it
+
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.http import JsonResponse
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+from .models import VoterDataVersion
+
+VERSION_CACHE_KEY = 'voter_analytics:data_version'
+
+
+def data_version():
+    '''Return the (version, loaded_at) of the current voter data. Kept in
+    the cache for a few seconds so most requests don't need a query.'''
+
+    stamp = cache.get(VERSION_CACHE_KEY)
+    if stamp is None:
+        row = VoterDataVersion.objects.first()
+        stamp = (row.version, row.loaded_at) if row else (0, None)
+        cache.set(VERSION_CACHE_KEY, stamp, settings.VOTER_DATA_VERSION_TTL)
+    return stamp
+
+
+def bump_data_version():
+    '''Move to a new version after the voter data changed. Call this inside
+    the transaction that changed it.'''
+
+    row, created = VoterDataVersion.objects.get_or_create(pk=1)
+    VoterDataVersion.objects.filter(pk=1).update(version=F('version') + 1,
+                                                 loaded_at=timezone.now())
+    row.refresh_from_db()
+
+    # other processes see the new version once their cached copy expires
+    stamp = (row.version, row.loaded_at)
+    transaction.on_commit(lambda: cache.set(VERSION_CACHE_KEY, stamp,
+                                            settings.VOTER_DATA_VERSION_TTL))
+
+
+def data_version_etag(key):
+    '''The ETag of a response that only changes with the voter data and
+    with key (what the request asks for).'''
+    version, loaded_at = data_version()
+    return f'{version}-{key}'
+
+
+def data_version_last_modified():
+    '''Anything computed from the voter data last changed when it was loaded.'''
+    version, loaded_at = data_version()
+    return loaded_at
+
+
+def conditional_on_data_version(request_key):
+    '''Class decorator for a JSON view whose GET response only changes with
+    the voter data and with request_key(request, *args, **kwargs). Browsers
+    and proxies may keep the response, but must check it is still current,
+    which costs a 304 with no queries when it is. request_key raises
+    ValueError for a bad request, which gets a 400 with the message.'''
+
+    def decorator(get):
+        @wraps(get)
+        def conditional_get(request, *args, **kwargs):
+            try:
+                key = request_key(request, *args, **kwargs)
+            except ValueError as e:
+                return JsonResponse({'error': str(e)}, status=400)
+            conditional = condition(etag_func=lambda *args, **kwargs: data_version_etag(key),
+                                    last_modified_func=lambda *args, **kwargs: data_version_last_modified())
+            return cache_control(public=True, no_cache=True)(conditional(get))(request, *args, **kwargs)
+        return conditional_get
+
+    return method_decorator(decorator, name='get')
@@ -0,0 +1,81 @@
+# voter_analytics/export.py
+# Made by Annelise Schreiber, aschreib@bu.edu
+# Sunday, October 18, 2026
+# Description: streaming CSV and NDJSON exports of the voters matching a
+# search, which never hold more than one chunk of rows in memory
+
+import csv
+import io
+import json
+import zlib
+
+from .ingest import batched
+from .lookups import value_path
+from .voter_csv import ELECTION_FIELDS
+
+# the Voter columns in an export, in order
+EXPORT_FIELDS = ['voter_id', 'last_name', 'first_name', 'street_num', 'street_name', 'apt_num',
+                 'zip_code', 'dob', 'date_registration', 'party_aff', 'precinct_num',
+                 *ELECTION_FIELDS, 'voter_score']
+
+# rows fetched from the database at a time
+EXPORT_CHUNK_SIZE = 2000
+
+# rows written out together as one piece of the response
+EXPORT_ROWS_PER_WRITE = 500
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def export_rows(queryset):
+    '''Generator of tuples of EXPORT_FIELDS for every voter in queryset, in
+    primary key order, read from a server-side cursor in chunks.'''
+    return (queryset.order_by('pk')
+                    .values_list(*[value_path(field) for field in EXPORT_FIELDS])
+                    .iterator(chunk_size=EXPORT_CHUNK_SIZE))
+
+
+def csv_lines(rows):
+    '''Generator of CSV text: a header, then the rows a few hundred at a time.'''
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        text = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return text
+
+    writer.writerow(EXPORT_FIELDS)
+    yield flush()
+    for batch in batched(rows, EXPORT_ROWS_PER_WRITE):
+        writer.writerows(batch)
+        yield flush()
+
+
+def ndjson_lines(rows):
+    '''Generator of NDJSON text: one JSON object per voter and line.'''
+    for batch in batched(rows, EXPORT_ROWS_PER_WRITE):
+        yield ''.join(json.dumps(dict(zip(EXPORT_FIELDS, row)), default=str) + '\n'
+                      for row in batch)
+
+
+def gzipped(chunks):
+    '''Compress a stream of text as it goes, in gzip format.'''
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16) # 16: gzip header
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(queryset, export_format, gzip=False):
+    '''The body of an export of queryset: an iterator of text, or of bytes
+    when gzip is on.'''
+    lines = csv_lines if export_format == 'csv' else ndjson_lines
+    chunks = lines(export_rows(queryset))
+    return gzipped(chunks) if gzip else chunks
@@ -0,0 +1,258 @@
+# voter_analytics/filters.py
+# Made by Annelise Schreiber, aschreib@bu.edu
+# Sunday, October 18, 2026
+# Description: the search parameters of the voter list and graphs pages,
+# declared once and compiled into a single Q object
+
+import hashlib
+from datetime import date
+from itertools import combinations
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from .dataversion import data_version
+from .fulltext import search_words, text_search_q
+from .lookups import value_path
+from .models import Voter
+from .voter_csv import ELECTION_FIELDS, PARTICIPATION_PATTERNS, participation_mask
+
+# the parties with their own option in the search form; "Other" is the rest
+MAIN_PARTIES = ['R ', 'D ', 'U ']
+
+
+# cleaning functions: turn a GET value into a normalized value, or raise
+# ValueError for a value that can't be searched for
+
+def clean_text(value):
+    '''Text is matched exactly (party codes even keep their padding).'''
+    return value
+
+
+def clean_int(value):
+    '''Numbers like zip codes: '02458' and '2458' are the same search.'''
+    return int(value)
+
+
+def clean_year(value):
+    '''A birth year for the min_dob/max_dob range.'''
+    year = int(value)
+    if not 1800 <= year <= 2100:
+        raise ValueError(f'{year} is not a birth year')
+    return year
+
+
+def clean_date(value):
+    '''A full YYYY-MM-DD date.'''
+    return date.fromisoformat(value)
+
+
+def clean_text_search(value):
+    '''A name/address text search needs at least one word.'''
+    if not search_words(value):
+        raise ValueError(value)
+    return ' '.join(value.split())
+
+
+def clean_checkbox(value):
+    '''Election checkboxes filter when they are 'on' or 'off'.'''
+    value = value.lower()
+    if value not in ('on', 'off'):
+        raise ValueError(value)
+    return value
+
+
+def clean_elections(value):
+    '''A set of elections, from a comma separated list of their names (or
+    checkboxes sharing a parameter name), as the names in ELECTION_FIELDS
+    order, comma separated.'''
+    names = {name.strip() for name in value.split(',') if name.strip()}
+    if not names or names - set(ELECTION_FIELDS):
+        raise ValueError(value)
+    return ','.join(election for election in ELECTION_FIELDS if election in names)
+
+
+class SearchFilter:
+    '''One search parameter: how to clean its value, and the Q objects it
+    adds for Voter and (if the cube can answer it) for VoterSummary.
+    A multiple parameter may be given more than once (like checkboxes
+    with the same name); its values are joined with commas.'''
+
+    def __init__(self, name, clean, voter_q, summary_q=None, multiple=False):
+        self.name = name
+        self.clean = clean
+        self.voter_q = voter_q
+        self.summary_q = summary_q
+        self.multiple = multiple
+
+
+def equals(field):
+    '''Q builder for a plain equality filter on a field (on the value of a
+    dictionary-encoded column, not its id).'''
+    return lambda value: Q(**{value_path(field): value})
+
+
+def party_q(value):
+    '''"Other" (not_rdu) means any party but the main three.'''
+    if value == 'not_rdu':
+        return ~Q(party_aff__code__in=MAIN_PARTIES)
+    return Q(party_aff__code=value)
+
+
+def checkbox(field):
+    '''Q builder for an election participation checkbox.'''
+    return lambda value: Q(**{field: value == 'on'})
+
+
+def matching_masks(value, exactly):
+    '''The participation bitmasks of the voters who took part in exactly,
+    or at least, the elections in a clean_elections value.'''
+    mask = participation_mask(value.split(','))
+    if exactly:
+        return [mask]
+    return [other for other in range(PARTICIPATION_PATTERNS) if other & mask == mask]
+
+
+def participation_q(exactly):
+    '''Q builder for a participation pattern: an IN over the matching
+    bitmasks, which the participation index answers.'''
+    return lambda value: Q(participation__in=matching_masks(value, exactly))
+
+
+def participation_summary_q(exactly):
+    '''The same pattern for the cube, which has the five flags instead.'''
+    def summary_q(value):
+        voted = value.split(',')
+        if exactly:
+            return Q(**{election: election in voted for election in ELECTION_FIELDS})
+        return Q(**{election: True for election in voted})
+    return summary_q
+
+
+def score_summary_q(value):
+    '''A voter score for the cube, which has no score column: the score is
+    the number of elections voted in, so any combination of that many of
+    the five flags matches.'''
+    combined = Q(pk__in=[])
+    if 0 <= value <= len(ELECTION_FIELDS):
+        for voted in combinations(ELECTION_FIELDS, value):
+            combined |= Q(**{election: election in voted for election in ELECTION_FIELDS})
+    return combined
+
+
+# every search parameter of the voter pages, in one place. min_dob/max_dob
+# compare dob against whole dates (not dob__year) so the dob indexes work
+VOTER_FILTERS = [
+    SearchFilter('first_name', clean_text, equals('first_name')),
+    SearchFilter('last_name', clean_text, equals('last_name')),
+    SearchFilter('street_num', clean_int, equals('street_num')),
+    SearchFilter('street_name', clean_text, equals('street_name')),
+    SearchFilter('apt_num', clean_text, equals('apt_num')),
+    SearchFilter('zip_code', clean_int, equals('zip_code'), equals('zip_code')),
+    SearchFilter('dob', clean_date, equals('dob')),
+    SearchFilter('min_dob', clean_year, lambda year: Q(dob__gte=date(year, 1, 1)),
+                 lambda year: Q(birth_year__gte=year)),
+    SearchFilter('max_dob', clean_year, lambda year: Q(dob__lte=date(year, 12, 31)),
+                 lambda year: Q(birth_year__lte=year)),
+    SearchFilter('party_aff', clean_text, party_q, party_q),
+    SearchFilter('voter_score', clean_int, equals('voter_score'), score_summary_q),
+    SearchFilter('precinct_num', clean_text, equals('precinct_num'), equals('precinct_num')),
+    *[SearchFilter(election, clean_checkbox, checkbox(election), checkbox(election))
+      for election in ELECTION_FIELDS],
+    SearchFilter('voted_exactly', clean_elections, participation_q(exactly=True),
+                 participation_summary_q(exactly=True), multiple=True),
+    SearchFilter('voted_at_least', clean_elections, participation_q(exactly=False),
+                 participation_summary_q(exactly=False), multiple=True),
+    SearchFilter('q', clean_text_search, text_search_q),
+]
+
+# every GET parameter that changes which voters match a search
+SEARCH_PARAMS = [search_filter.name for search_filter in VOTER_FILTERS]
+
+
+class VoterSearch:
+    '''A search of the voters, made from GET parameters (or any dict).
+    Empty and invalid parameters are left out, so two requests asking for
+    the same thing, in any order, get the same key.'''
+
+    def __init__(self, params):
+        self.values = {}
+        self.filters = []
+        for search_filter in VOTER_FILTERS:
+            value = params.get(search_filter.name, '')
+            if search_filter.multiple and hasattr(params, 'getlist'):
+                value = ','.join(params.getlist(search_filter.name))
+            if value == '':
+                continue
+            try:
+                self.values[search_filter.name] = search_filter.clean(value)
+            except ValueError:
+                continue # ignore values nobody could match
+            self.filters.append(search_filter)
+
+    def items(self):
+        '''The cleaned search parameters as sorted (name, value) pairs.'''
+        return tuple(sorted(self.values.items()))
+
+    @property
+    def key(self):
+        '''A short string identifying this search, for use in cache keys.'''
+        canonical = urlencode([(name, str(value)) for name, value in self.items()])
+        return hashlib.md5(canonical.encode()).hexdigest()
+
+    def q(self):
+        '''One Q object for Voter combining every filter of the search.'''
+        combined = Q()
+        for search_filter in self.filters:
+            combined &= search_filter.voter_q(self.values[search_filter.name])
+        return combined
+
+    def summary_q(self):
+        '''The same search as a Q object for VoterSummary, or None if it uses
+        a field the cube doesn't have.'''
+        combined = Q()
+        for search_filter in self.filters:
+            if search_filter.summary_q is None:
+                return None
+            combined &= search_filter.summary_q(self.values[search_filter.name])
+        return combined
+
+    def uses(self, *names):
+        '''Whether the search filters on any of these parameters.'''
+        return any(name in self.values for name in names)
+
+    def without(self, *names):
+        '''A copy of this search without some of its parameters.'''
+        params = {name: str(value) for name, value in self.values.items() if name not in names}
+        return VoterSearch(params)
+
+    def matching_pks(self):
+        '''The sorted primary keys of the voters matching this search, cached
+        for VOTER_RESULT_CACHE_TTL seconds per voter data version, or None if
+        there are more than VOTER_RESULT_CACHE_MAX_IDS of them. A search
+        whose count is already known to be over the limit reads no keys.'''
+
+        from .counts import known_count # counts needs this module first
+
+        version, loaded_at = data_version()
+        cache_key = f'voter_analytics:pks:{version}:{self.key}'
+
+        pks = cache.get(cache_key)
+        if pks is None:
+            limit = settings.VOTER_RESULT_CACHE_MAX_IDS
+            count = known_count(self)
+            if count is not None and count > limit:
+                pks = 'too many' # no need to read the keys to find out
+            else:
+                # sorted here rather than with ORDER BY pk, which would make
+                # SQLite walk the whole table in pk order instead of using
+                # the index of the search
+                pks = sorted(Voter.objects.filter(self.q()).order_by()
+                                     .values_list('pk', flat=True)[:limit + 1])
+                if len(pks) > limit:
+                    pks = 'too many' # remember not to try again
+            cache.set(cache_key, pks, settings.VOTER_RESULT_CACHE_TTL)
+
+        return pks if isinstance(pks, list) else None
@@ -0,0 +1,180 @@
+# voter_analytics/fulltext.py
+# Made by Annelise Schreiber, aschreib@bu.edu
+# Sunday, October 18, 2026
+# Description: full-text search of voter names and addresses, with prefix,
+# fuzzy (misspelled) and ranked matching, using SQLite FTS5 indexes
+
+import hashlib
+import re
+from difflib import SequenceMatcher
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .dataversion import data_version
+
+# a misspelled word matches vocabulary words that are at least this similar
+FUZZY_MIN_SIMILARITY = 0.75
+
+# how many similar vocabulary words each misspelled word may stand for
+FUZZY_MAX_WORDS = 5
+
+# the FTS5 tables, created by migration 0012 on SQLite (and made
+# contentless by 0014):
+#   voter_fts          words of every voter's name, street number and
+#                      street, with prefix indexes. It keeps no copy of the
+#                      text, only the index, and is filled by FILL_TEXT_SEARCH
+#   voter_fts_words    one row per distinct word in voter_fts
+#   voter_fts_trigrams the distinct words split into trigrams, so a
+#                      misspelled word finds the words it is close to
+
+
+def text_search_available():
+    '''The FTS5 indexes only exist on SQLite; other databases fall back to
+    a (slow) case-insensitive substring search.'''
+    return connection.vendor == 'sqlite'
+
+
+# street names live in the Street lookup table, so they are joined in
+FILL_TEXT_SEARCH = '''
+    INSERT INTO voter_fts(rowid, first_name, last_name, street_num, street_name)
+    SELECT voter.id, voter.first_name, voter.last_name, voter.street_num, street.name
+    FROM voter_analytics_voter AS voter
+    JOIN voter_analytics_street AS street ON street.id = voter.street_name_id'''
+
+
+def rebuild_text_search():
+    '''Re-read every Voter into the full-text indexes. Call this inside the
+    transaction that changed Voter.'''
+    if not text_search_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("INSERT INTO voter_fts(voter_fts) VALUES('delete-all')")
+        cursor.execute(FILL_TEXT_SEARCH)
+        cursor.execute('DELETE FROM voter_fts_trigrams')
+        cursor.execute('INSERT INTO voter_fts_trigrams(word) SELECT term FROM voter_fts_words')
+
+
+def search_words(text):
+    '''Split what was typed into lowercase words (FTS5 ignores case and
+    punctuation too, so quotes and operators can't get through).'''
+    return re.findall(r'\w+', text.lower())
+
+
+def similar_words(cursor, word):
+    '''Words in the index that look like a misspelling of word: they share
+    trigrams with it and are at least FUZZY_MIN_SIMILARITY alike.'''
+    trigrams = {word[i:i + 3] for i in range(len(word) - 2)}
+    if not trigrams:
+        return []
+
+    cursor.execute('SELECT word FROM voter_fts_trigrams WHERE voter_fts_trigrams MATCH %s '
+                   'ORDER BY rank LIMIT 100',
+                   [' OR '.join(f'"{trigram}"' for trigram in trigrams)])
+    scored = [(SequenceMatcher(None, word, candidate).ratio(), candidate)
+              for candidate, in cursor.fetchall() if candidate != word]
+    scored.sort(reverse=True)
+    return [candidate for score, candidate in scored[:FUZZY_MAX_WORDS]
+            if score >= FUZZY_MIN_SIMILARITY]
+
+
+# the voters matching an FTS5 query, as a subquery Voter can be filtered by
+MATCH_VOTER_IDS = 'SELECT rowid FROM voter_fts WHERE voter_fts MATCH %s'
+
+
+def match_voter_ids(cursor, match, limit, exclude=(), within=None):
+    '''Primary keys of up to limit voters matching an FTS5 query, best
+    first; only those in the set within, if it is given.'''
+    cursor.execute(MATCH_VOTER_IDS + ' ORDER BY rank', [match])
+    pks = []
+    for pk, in cursor:
+        if pk in exclude or (within is not None and pk not in within):
+            continue
+        pks.append(pk)
+        if len(pks) >= limit:
+            break
+    return pks
+
+
+def text_search_matches(text):
+    '''The FTS5 queries of a text search, from the strictest to the
+    loosest: every word must match a word of the voter exactly, as its start
+    ("sch" finds SCHREIBER), or as its start or a close misspelling
+    ("shreiber"). Each query matches everyone the ones before it match.
+    Returns None where there is no full-text index, and [] when there is
+    nothing to search for. Cached per voter data version.'''
+
+    if not text_search_available():
+        return None
+    words = search_words(text)
+    if not words:
+        return []
+
+    version, loaded_at = data_version()
+    words_key = hashlib.md5(' '.join(words).encode()).hexdigest()
+    cache_key = f'voter_analytics:text_search:{version}:{words_key}'
+    matches = cache.get(cache_key)
+    if matches is not None:
+        return matches
+
+    with connection.cursor() as cursor:
+        exact = [[f'"{word}"'] for word in words]
+        prefix = [[f'"{word}"*'] for word in words]
+        fuzzy = [[f'"{word}"*'] + [f'"{similar}"' for similar in similar_words(cursor, word)]
+                 for word in words]
+    matches = [' AND '.join(f'({" OR ".join(options)})' for options in alternatives)
+               for alternatives in [exact, prefix, fuzzy]]
+
+    cache.set(cache_key, matches, settings.VOTER_RESULT_CACHE_TTL)
+    return matches
+
+
+def search_voter_ids(text, within=None):
+    '''Primary keys of the voters whose names and address match text (and
+    whose primary keys are in the set within, if given), best match first, at most
+    VOTER_TEXT_SEARCH_LIMIT of them: exact matches come first, then prefix
+    matches, then fuzzy ones, each ranked by FTS5's bm25. Returns None
+    where there is no full-text index. The limit is only for listing the
+    best matches; text_search_q finds them all.'''
+
+    matches = text_search_matches(text)
+    if matches is None:
+        return None
+
+    limit = settings.VOTER_TEXT_SEARCH_LIMIT
+    pks = []
+    with connection.cursor() as cursor:
+        for match in matches:
+            if len(pks) >= limit:
+                break
+            pks += match_voter_ids(cursor, match, limit - len(pks), exclude=set(pks), within=within)
+    return pks
+
+
+def text_search_q(text):
+    '''Q object for all the voters matching a text search.'''
+    matches = text_search_matches(text)
+    if matches == []:
+        return Q(pk__in=[])
+    if matches is not None:
+        # the loosest query matches everyone a stricter one does
+        return Q(pk__in=RawSQL(MATCH_VOTER_IDS, [matches[-1]]))
+
+    # no full-text index: every word has to appear somewhere
+    combined = Q()
+    for word in search_words(text):
+        combined &= (Q(first_name__icontains=word) | Q(last_name__icontains=word) |
+                     Q(street_name__name__icontains=word))
+    return combined
+
+
+def ranked_pks(queryset, text):
+    '''The primary keys in queryset (a text search, maybe with other
+    filters) in order of how well they match text, at most
+    VOTER_TEXT_SEARCH_LIMIT of them, or None without a full-text index.'''
+    if not text_search_available():
+        return None
+    return search_voter_ids(text, within=set(queryset.values_list('pk', flat=True)))
@@ -0,0 +1,276 @@
+# voter_analytics/ingest.py
+# Made by Annelise Schreiber, aschreib@bu.edu
+# Sunday, October 18, 2026
+# Description: streaming bulk and incremental loaders for the voter CSV file
+
+import csv
+import math
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+
+from .dataversion import bump_data_version
+from .fulltext import rebuild_text_search
+from .lookups import LookupCodes, clear_lookup_values
+from .models import Voter
+from .registrations import rebuild_registration_days
+from .rollup import rebuild_area_rollup
+from .sampling import rebuild_voter_sample
+from .summary import rebuild_voter_summary
+from .voter_csv import ELECTION_FIELDS, ROW_FIELDS, chunk_ranges, parse_chunk, parse_row
+
+# how many rows go into each bulk INSERT
+DEFAULT_BATCH_SIZE = 5000
+
+# how many bad lines we keep for the error report
+MAX_REPORTED_ERRORS = 20
+
+# the parallel parser splits the file into this many chunks per worker,
+# so one slow chunk doesn't leave the other workers idle
+CHUNKS_PER_WORKER = 4
+
+# bigger files get more chunks, so no chunk has more than this many bytes
+MAX_CHUNK_BYTES = 1024 * 1024
+
+# how many chunks per worker may be parsed ahead of the writer; parsed rows
+# waiting to be inserted are what the parallel reader holds in memory
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+class ErrorReport:
+    '''Count the bad rows in a load, but only keep the first few of them.'''
+
+    def __init__(self, limit=MAX_REPORTED_ERRORS):
+        self.limit = limit
+        self.count = 0
+        self.samples = [] # (line number, raw row, error message)
+
+    def add(self, line_num, row, error):
+        '''Record one bad row.'''
+        self.count += 1
+        if len(self.samples) < self.limit:
+            self.samples.append((line_num, row, str(error)))
+
+    def __bool__(self):
+        return self.count > 0
+
+
+class LoadResult:
+    '''Summary of one run of the loader.'''
+
+    def __init__(self, rows, errors, seconds, updated=0, deleted=0, unchanged=0,
+                 refresh_seconds=0.0):
+        self.rows = rows # rows inserted
+        self.errors = errors
+        self.seconds = seconds # reading the file and writing Voter
+        self.refresh_seconds = refresh_seconds # rebuilding the derived tables
+        self.updated = updated
+        self.deleted = deleted
+        self.unchanged = unchanged
+
+    @property
+    def total_seconds(self):
+        '''How long the whole load took.'''
+        return self.seconds + self.refresh_seconds
+
+    @property
+    def rows_per_second(self):
+        '''Throughput of the CSV ingest (not counting the derived tables).'''
+        processed = self.rows + self.updated + self.unchanged
+        return processed / self.seconds if self.seconds else 0.0
+
+
+def read_voter_rows(filename, errors, numbered=False):
+    '''Generator that yields a dict of Voter field values for every good row
+    in the CSV file. Bad rows are added to errors and skipped. With
+    numbered=True it yields (line number, fields) pairs instead.'''
+
+    with open(filename, 'r', newline='') as f:
+        reader = csv.reader(f)
+
+        #discard headers:
+        next(reader, None)
+
+        for row in reader:
+            try:
+                fields = parse_row(row)
+            except (IndexError, ValueError) as e:
+                errors.add(reader.line_num, row, e)
+                continue
+            yield (reader.line_num, fields) if numbered else fields
+
+
+def read_voter_rows_parallel(filename, errors, workers, numbered=False):
+    '''Same as read_voter_rows, but the file is split into line-aligned
+    byte ranges that are parsed in a pool of worker processes. Rows still
+    come out in file order, so a single writer can insert them. Only a few
+    chunks are parsed ahead of the writer, so memory stays bounded however
+    big the file is.'''
+
+    chunks = max(workers * CHUNKS_PER_WORKER, math.ceil(os.path.getsize(filename) / MAX_CHUNK_BYTES))
+    ranges = iter(chunk_ranges(filename, chunks))
+    line_offset = 1 # the header line
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque(pool.submit(parse_chunk, chunk)
+                        for chunk in islice(ranges, workers * CHUNKS_IN_FLIGHT_PER_WORKER))
+        while pending:
+            rows, bad_rows, line_count = pending.popleft().result()
+            # keep the workers busy while these rows are written
+            chunk = next(ranges, None)
+            if chunk is not None:
+                pending.append(pool.submit(parse_chunk, chunk))
+
+            for line_num, row, message in bad_rows:
+                errors.add(line_offset + line_num, row, message)
+
+            # the good rows are every line of the chunk except the bad ones
+            bad_lines = {line_num for line_num, row, message in bad_rows}
+            line_num = 0
+            for values in rows:
+                line_num += 1
+                while line_num in bad_lines:
+                    line_num += 1
+                fields = dict(zip(ROW_FIELDS, values))
+                yield (line_offset + line_num, fields) if numbered else fields
+            line_offset += line_count
+
+
+def voter_rows(filename, errors, workers=1, numbered=False):
+    '''Pick the serial or parallel CSV reader.'''
+    if workers > 1:
+        return read_voter_rows_parallel(filename, errors, workers, numbered)
+    return read_voter_rows(filename, errors, numbered)
+
+
+def batched(iterable, size):
+    '''Generator that groups an iterable into lists of at most size items.'''
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def refresh_derived_tables():
+    '''Rebuild every table that is computed from Voter. The loaders call
+    this inside their transaction, so readers never see a half-updated set.
+    Also moves to a new data version, which invalidates cached results.'''
+    clear_lookup_values()
+    rebuild_voter_summary()
+    rebuild_area_rollup()
+    rebuild_registration_days()
+    rebuild_voter_sample()
+    rebuild_text_search()
+    bump_data_version()
+
+
+def bulk_load(filename=None, batch_size=DEFAULT_BATCH_SIZE, errors=None, workers=1):
+    '''Replace every Voter with the rows in the CSV file, using batched
+    bulk_create calls inside a single transaction. With workers > 1 the
+    file is parsed in that many processes.'''
+
+    if filename is None:
+        filename = settings.VOTER_DATA_FILE
+    if errors is None:
+        errors = ErrorReport()
+
+    start = time.perf_counter()
+    created = 0
+
+    with transaction.atomic():
+        Voter.objects.all().delete()
+        codes = LookupCodes()
+
+        for batch in batched(voter_rows(filename, errors, workers), batch_size):
+            Voter.objects.bulk_create([Voter(**fields) for fields in codes.encode(batch)],
+                                      batch_size=batch_size)
+            created += len(batch)
+
+        seconds = time.perf_counter() - start
+        refresh_derived_tables()
+
+    return LoadResult(created, errors, seconds, refresh_seconds=time.perf_counter() - start - seconds)
+
+
+# every Voter field that comes from the CSV file (what bulk_update rewrites)
+UPDATE_FIELDS = ['first_name', 'last_name', 'street_num', 'street_name', 'apt_num',
+                 'zip_code', 'dob', 'date_registration', 'party_aff', 'precinct_num',
+                 *ELECTION_FIELDS, 'voter_score', 'participation', 'household_key', 'row_hash']
+
+
+def incremental_load(filename=None, batch_size=DEFAULT_BATCH_SIZE, errors=None, workers=1):
+    '''Bring the Voter table in line with the CSV file by applying only the
+    differences: new voter IDs are inserted, rows whose fingerprint changed
+    are updated in place, and voter IDs missing from the file are deleted.
+    Unchanged voters keep their primary keys. With workers > 1 the file is
+    parsed in that many processes.'''
+
+    if filename is None:
+        filename = settings.VOTER_DATA_FILE
+    if errors is None:
+        errors = ErrorReport()
+
+    start = time.perf_counter()
+    created = updated = unchanged = 0
+
+    with transaction.atomic():
+        # what is already stored: voter_id -> (pk, fingerprint)
+        existing = {}
+        stale = [] # pks of voters to delete at the end
+        for voter_id, pk, row_hash in Voter.objects.values_list('voter_id', 'pk', 'row_hash').iterator():
+            if not voter_id or voter_id in existing:
+                # loaded before we kept Voter IDs, or a duplicate ID: reload it
+                stale.append(pk)
+            else:
+                existing[voter_id] = (pk, row_hash)
+
+        seen = set()
+        codes = LookupCodes()
+        to_create = []
+        to_update = []
+
+        for line_num, fields in voter_rows(filename, errors, workers, numbered=True):
+            voter_id = fields['voter_id']
+            if not voter_id or voter_id in seen:
+                errors.add(line_num, [voter_id], 'missing or duplicate Voter ID Number')
+                continue
+            seen.add(voter_id)
+            codes.encode([fields])
+
+            if voter_id not in existing:
+                to_create.append(Voter(**fields))
+            elif existing[voter_id][1] != fields['row_hash']:
+                to_update.append(Voter(pk=existing[voter_id][0], **fields))
+            else:
+                unchanged += 1
+
+            if len(to_create) >= batch_size:
+                Voter.objects.bulk_create(to_create, batch_size=batch_size)
+                created += len(to_create)
+                to_create = []
+            if len(to_update) >= batch_size:
+                Voter.objects.bulk_update(to_update, UPDATE_FIELDS, batch_size=batch_size)
+                updated += len(to_update)
+                to_update = []
+
+        Voter.objects.bulk_create(to_create, batch_size=batch_size)
+        created += len(to_create)
+        Voter.objects.bulk_update(to_update, UPDATE_FIELDS, batch_size=batch_size)
+        updated += len(to_update)
+
+        # anyone no longer in the file
+        stale += [pk for voter_id, (pk, row_hash) in existing.items() if voter_id not in seen]
+        for batch in batched(stale, batch_size):
+            Voter.objects.filter(pk__in=batch).delete()
+
+        seconds = time.perf_counter() - start
+        refresh_derived_tables()
+
+    return LoadResult(created, errors, seconds, updated=updated, deleted=len(stale),
+                      unchanged=unchanged, refresh_seconds=time.perf_counter() - start - seconds)
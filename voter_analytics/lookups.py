@@ -0,0 +1,92 @@
+# voter_analytics/lookups.py
+# Made by Annelise Schreiber, aschreib@bu.edu
+# Sunday, October 18, 2026
+# Description: the dictionary-encoded Voter columns: turning values into
+# lookup table ids while loading, and ids back into values for display
+
+from .models import Party, Precinct, Street, ZipCode
+
+# Voter column -> (lookup model, the lookup field holding the value)
+ENCODED_FIELDS = {
+    'party_aff': (Party, 'code'),
+    'precinct_num': (Precinct, 'name'),
+    'street_name': (Street, 'name'),
+    'zip_code': (ZipCode, 'code'),
+}
+
+# for select_related, so pages that show voters don't query each lookup row
+LOOKUP_FIELDS = list(ENCODED_FIELDS)
+
+
+def value_path(field):
+    '''The lookup path to a column's value ('party_aff' -> 'party_aff__code'),
+    for filters and values_list; other columns are returned as they are.'''
+    if field in ENCODED_FIELDS:
+        model, value_field = ENCODED_FIELDS[field]
+        return f'{field}__{value_field}'
+    return field
+
+
+class LookupCodes:
+    '''Hands out the lookup table ids for the values of a voter file while
+    it is loaded, adding lookup rows for values never seen before.'''
+
+    def __init__(self):
+        self.ids = {field: dict(model.objects.values_list(value_field, 'id'))
+                    for field, (model, value_field) in ENCODED_FIELDS.items()}
+
+    def encode(self, rows):
+        '''Replace the values in a batch of parsed rows (dicts from
+        voter_csv.parse_row) with lookup ids, e.g. party_aff='D ' becomes
+        party_aff_id=2. Changes the dicts in place and returns them.'''
+        for field, (model, value_field) in ENCODED_FIELDS.items():
+            ids = self.ids[field]
+            new_values = {row[field] for row in rows} - ids.keys()
+            if new_values:
+                model.objects.bulk_create([model(**{value_field: value}) for value in new_values],
+                                          ignore_conflicts=True)
+                ids.update(model.objects.filter(**{f'{value_field}__in': new_values})
+                                        .values_list(value_field, 'id'))
+            for row in rows:
+                row[f'{field}_id'] = ids[row.pop(field)]
+        return rows
+
+
+class LookupValues(dict):
+    '''{id: value} for one lookup table. Ids added after it was read are
+    fetched the first time they are asked for.'''
+
+    def __init__(self, field):
+        self.model, self.value_field = ENCODED_FIELDS[field]
+        super().__init__(self.model.objects.values_list('id', self.value_field))
+
+    def __missing__(self, pk):
+        if pk is None:
+            return None
+        value = self.model.objects.values_list(self.value_field, flat=True).get(pk=pk)
+        self[pk] = value
+        return value
+
+
+# LookupValues of each encoded column, kept for the life of the process
+# (lookup rows never change) until clear_lookup_values is called
+_values = {}
+
+
+def lookup_values(field):
+    '''The {id: value} LookupValues of an encoded column.'''
+    if field not in _values:
+        _values[field] = LookupValues(field)
+    return _values[field]
+
+
+def decode_keys(field, counts):
+    '''{id: n} counts of an encoded column as {value: n}.'''
+    values = lookup_values(field)
+    return {values[pk]: n for pk, n in counts.items()}
+
+
+def clear_lookup_values():
+    '''Forget the lookup values read so far (after a load, since a rolled
+    back load can leave ids that get reused).'''
+    _values.clear()
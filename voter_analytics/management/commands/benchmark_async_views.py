@@ -0,0 +1,133 @@
+# voter_analytics/management/commands/benchmark_async_views.py
+# Made by Annelise Schreiber, aschreib@bu.edu
+# Sunday, October 18, 2026
+# Description: manage.py command comparing how many requests per second the
+# voter pages serve to many concurrent users under WSGI and under ASGI
+
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+
+from voter_analytics.benchmarks import asgi_get, load_synthetic, test_database, wsgi_get
+from voter_analytics.ingest import refresh_derived_tables
+from voter_analytics.models import Voter
+
+# how the pages are served: the sync views under WSGI (a thread per
+# request, like a threaded WSGI server), the same sync views under ASGI,
+# and the async views under ASGI
+SETUPS = [
+    ('WSGI, sync views', 'wsgi', '/voter_analytics/'),
+    ('ASGI, sync views', 'asgi', '/voter_analytics/'),
+    ('ASGI, async views', 'asgi', '/voter_analytics/async/'),
+]
+
+
+def request_mix(count, pks):
+    '''The (page, query string) requests each simulated user makes: lists,
+    detail pages and graphs for different searches, so the caches don't
+    answer everything.'''
+    requests = []
+    for i in range(count):
+        year = 1930 + (i * 7) % 70
+        kind = i % 3
+        if kind == 0:
+            requests.append(('', f'min_dob={year}&count=1'))
+        elif kind == 1:
+            requests.append((f'voter/{pks[i % len(pks)]}', ''))
+        else:
+            requests.append(('graphs', f'min_dob={year}&party_aff=D+'))
+    return requests
+
+
+def summarize(results, seconds):
+    '''Throughput, errors and latency percentiles of one run, from the
+    (milliseconds, status code) of every request.'''
+    latencies = sorted(ms for user in results for ms, status in user)
+    return {
+        'requests': len(latencies),
+        'errors': sum(status != 200 for user in results for ms, status in user),
+        'per_second': len(latencies) / seconds,
+        'p50': statistics.median(latencies),
+        'p95': latencies[int(len(latencies) * 0.95) - 1],
+    }
+
+
+def run_wsgi(prefix, users, requests):
+    '''Every user sends its requests one after another, in its own thread.'''
+    application = WSGIHandler()
+
+    def user(number):
+        latencies = []
+        for page, query in requests:
+            start = time.perf_counter()
+            status = wsgi_get(application, prefix + page, query)
+            latencies.append(((time.perf_counter() - start) * 1000, status))
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        results = list(pool.map(user, range(users)))
+    return summarize(results, time.perf_counter() - start)
+
+
+def run_asgi(prefix, users, requests):
+    '''Every user sends its requests one after another, in its own task on
+    one event loop.'''
+    application = ASGIHandler()
+
+    async def user():
+        latencies = []
+        for page, query in requests:
+            start = time.perf_counter()
+            status = await asgi_get(application, prefix + page, query)
+            latencies.append(((time.perf_counter() - start) * 1000, status))
+        return latencies
+
+    async def all_users():
+        return await asyncio.gather(*[user() for i in range(users)])
+
+    start = time.perf_counter()
+    results = asyncio.run(all_users())
+    return summarize(results, time.perf_counter() - start)
+
+
+class Command(BaseCommand):
+    '''Serve the voter pages to many simulated users at once, straight
+    through Django's WSGI and ASGI handlers (no web server in between).'''
+
+    help = 'Benchmark concurrent-user throughput of the voter pages under WSGI and ASGI.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000,
+                            help='how many made-up voters to load')
+        parser.add_argument('--users', type=int, nargs='+', default=[1, 8, 32],
+                            help='numbers of concurrent users to try')
+        parser.add_argument('--requests', type=int, default=30,
+                            help='requests each user makes')
+
+    def handle(self, *args, **options):
+        results = []
+        with test_database():
+            self.stdout.write(f"Loading {options['rows']:,} made-up voters...")
+            load_synthetic(options['rows'])
+            refresh_derived_tables()
+            pks = list(Voter.objects.values_list('pk', flat=True)[:1000])
+            requests = request_mix(options['requests'], pks)
+
+            for users in options['users']:
+                for label, server, prefix in SETUPS:
+                    cache.clear() # every setup starts cold
+                    run = run_wsgi if server == 'wsgi' else run_asgi
+                    results.append((label, users, run(prefix, users, requests)))
+
+        self.stdout.write(f"{'setup':<20} {'users':>6} {'requests':>9} {'errors':>7} {'req/s':>8} "
+                          f"{'p50 (ms)':>9} {'p95 (ms)':>9}")
+        for label, users, result in results:
+            self.stdout.write(f"{label:<20} {users:>6} {result['requests']:>9} {result['errors']:>7} "
+                              f"{result['per_second']:>8.1f} {result['p50']:>9.1f} {result['p95']:>9.1f}")
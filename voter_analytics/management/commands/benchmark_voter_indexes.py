@@ -0,0 +1,73 @@
+# voter_analytics/management/commands/benchmark_voter_indexes.py
+# Made by Annelise Schreiber, aschreib@bu.edu
+# Sunday, October 18, 2026
+# Description: manage.py command comparing voter search query times with and
+# without the Voter indexes, on a large made-up table
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from voter_analytics.benchmarks import load_synthetic, test_database, time_call, view_queryset
+from voter_analytics.models import Voter
+from voter_analytics.views import VoterRecordsListView
+
+# filter combinations people actually use on the search form
+QUERIES = [
+    ('party', {'party_aff': 'R '}),
+    ('party + birth years', {'party_aff': 'D ', 'min_dob': '1960', 'max_dob': '1969'}),
+    ('birth years', {'min_dob': '1990', 'max_dob': '1995'}),
+    ('voter score', {'voter_score': '5'}),
+    ('voter score + party', {'voter_score': '0', 'party_aff': 'R '}),
+    ('all elections', {'v20state': 'on', 'v21town': 'on', 'v21primary': 'on',
+                       'v22general': 'on', 'v23town': 'on'}),
+    ('zip code', {'zip_code': '2459'}),
+    ('precinct', {'precinct_num': '3B'}),
+    ('last name', {'last_name': 'MARTOR'}),
+]
+
+
+class Command(BaseCommand):
+    '''Time the voter list filters on a made-up table, before and after
+    creating the indexes declared on Voter.'''
+
+    help = 'Benchmark voter search queries with and without the Voter indexes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000,
+                            help='how many made-up voters to load')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='runs per query (the median is reported)')
+
+    def run_queries(self, repeat):
+        '''Time the count and the first page of every query.'''
+        timings = {}
+        for label, params in QUERIES:
+            results = view_queryset(VoterRecordsListView, params)
+            count_ms = time_call(lambda: results.count(), repeat)
+            page_ms = time_call(lambda: list(results.order_by('pk')[:100]), repeat)
+            timings[label] = (count_ms, page_ms)
+        return timings
+
+    def handle(self, *args, **options):
+        with test_database():
+            # start without the indexes (it also makes the load faster)
+            with connection.schema_editor() as editor:
+                for index in Voter._meta.indexes:
+                    editor.remove_index(Voter, index)
+
+            self.stdout.write(f"Loading {options['rows']:,} made-up voters...")
+            load_synthetic(options['rows'])
+            before = self.run_queries(options['repeat'])
+
+            with connection.schema_editor() as editor:
+                for index in Voter._meta.indexes:
+                    editor.add_index(Voter, index)
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+            after = self.run_queries(options['repeat'])
+
+        self.stdout.write(f"{'query':<22} {'count (ms)':>21} {'first page (ms)':>21}")
+        self.stdout.write(f"{'':<22} {'no index':>10} {'indexed':>10} {'no index':>10} {'indexed':>10}")
+        for label, params in QUERIES:
+            self.stdout.write(f'{label:<22} {before[label][0]:>10.1f} {after[label][0]:>10.1f} '
+                              f'{before[label][1]:>10.1f} {after[label][1]:>10.1f}')
@@ -0,0 +1,138 @@
+# voter_analytics/management/commands/benchmark_voter_pages.py
+# Made by Annelise Schreiber, aschreib@bu.edu
+# Sunday, October 18, 2026
+# Description: manage.py command timing the voter list (first, middle and
+# last page), graphs and detail pages under common searches, and saving the
+# timings as JSON so runs can be compared over time
+
+import json
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from voter_analytics.benchmarks import load_synthetic, test_database, time_call, wsgi_get
+from voter_analytics.filters import VoterSearch
+from voter_analytics.ingest import bulk_load, refresh_derived_tables
+from voter_analytics.models import Voter
+from voter_analytics.pagination import encode_cursor
+from voter_analytics.views import VoterRecordsListView
+
+# searches people actually make on the search form
+FILTER_MIXES = [
+    ('no filters', {}),
+    ('party', {'party_aff': 'D '}),
+    ('party + birth years', {'party_aff': 'R ', 'min_dob': '1960', 'max_dob': '1979'}),
+    ('other parties', {'party_aff': 'not_rdu'}),
+    ('zip code', {'zip_code': '2459'}),
+    ('precinct + voter score', {'precinct_num': '3B', 'voter_score': '2'}),
+    ('all elections', {'v20state': 'on', 'v21town': 'on', 'v21primary': 'on',
+                       'v22general': 'on', 'v23town': 'on'}),
+]
+
+PREFIX = '/voter_analytics/'
+
+
+def page_requests(params):
+    '''The (page, path, query string) requests timed for one search: the
+    first, middle and last page of the voter list (following the keyset
+    cursors the page links use), the graphs, and one voter's detail page.'''
+    query = urlencode(params)
+    results = Voter.objects.filter(VoterSearch(params).q()).order_by('pk')
+    pks = results.values_list('pk', flat=True)
+    count = results.count()
+
+    requests = [('records, first page', '', query)]
+    if not count:
+        return requests + [('graphs', 'graphs', query)]
+
+    per_page = VoterRecordsListView.paginate_by
+    middle = (count - 1) // per_page // 2 * per_page
+    if middle:
+        cursor = encode_cursor('after', pks[middle - 1])
+        requests.append(('records, middle page', '', urlencode({**params, 'cursor': cursor})))
+    cursor = encode_cursor('before', pks[count - 1] + 1)
+    requests.append(('records, last page', '', urlencode({**params, 'cursor': cursor})))
+    requests.append(('graphs', 'graphs', query))
+    requests.append(('detail', f'voter/{pks[middle]}', ''))
+    return requests
+
+
+class Command(BaseCommand):
+    '''Time whole requests (URL routing, views, queries and templates)
+    through Django's WSGI handler, with cold and with warm caches.'''
+
+    help = 'Benchmark the voter list, graphs and detail pages and save the timings as JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000,
+                            help='how many made-up voters to load')
+        parser.add_argument('--file', default=None,
+                            help='load this voter CSV file instead (e.g. from generate_voters)')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='runs per request (the median is reported)')
+        parser.add_argument('--output', default='voter_page_benchmark.json',
+                            help='JSON file to write the timings to')
+
+    def time_requests(self, repeat):
+        '''Time every request of every filter mix; cold means the cache
+        was cleared first, warm that the same request was just made.'''
+        application = WSGIHandler()
+
+        def cold(path, query):
+            cache.clear()
+            return wsgi_get(application, PREFIX + path, query)
+
+        results = []
+        for label, params in FILTER_MIXES:
+            for page, path, query in page_requests(params):
+                status = cold(path, query)
+                results.append({
+                    'filters': label,
+                    'page': page,
+                    'url': PREFIX + path + (f'?{query}' if query else ''),
+                    'status': status,
+                    'cold_ms': round(time_call(lambda: cold(path, query), repeat), 2),
+                    'warm_ms': round(time_call(lambda: wsgi_get(application, PREFIX + path, query),
+                                               repeat), 2),
+                })
+        return results
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1')
+
+        with test_database():
+            if options['file']:
+                self.stdout.write(f"Loading {options['file']}...")
+                try:
+                    bulk_load(options['file'])
+                except FileNotFoundError:
+                    raise CommandError(f"No such file: {options['file']}")
+            else:
+                self.stdout.write(f"Loading {options['rows']:,} made-up voters...")
+                load_synthetic(options['rows'])
+                refresh_derived_tables()
+
+            report = {
+                'created': timezone.now().isoformat(timespec='seconds'),
+                'voters': Voter.objects.count(),
+                'source': options['file'] or 'synthetic',
+                'database': connection.vendor,
+                'columnar_engine': settings.VOTER_COLUMNAR_ENGINE,
+                'repeat': options['repeat'],
+                'results': self.time_requests(options['repeat']),
+            }
+
+        with open(options['output'], 'w') as file:
+            json.dump(report, file, indent=2)
+
+        self.stdout.write(f"{'filters':<24} {'page':<22} {'status':>6} {'cold (ms)':>10} {'warm (ms)':>10}")
+        for result in report['results']:
+            self.stdout.write(f"{result['filters']:<24} {result['page']:<22} {result['status']:>6} "
+                              f"{result['cold_ms']:>10.1f} {result['warm_ms']:>10.1f}")
+        self.stdout.write(f"Saved to {options['output']}")
@@ -0,0 +1,40 @@
+# voter_analytics/management/commands/generate_voters.py
+# Made by Annelise Schreiber, aschreib@bu.edu
+# Sunday, October 18, 2026
+# Description: manage.py command writing a voter CSV file of made-up voters,
+# in the same layout as the real file, for benchmarks at any size
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from voter_analytics.synthetic import write_csv
+
+
+class Command(BaseCommand):
+    '''Write made-up voters to a CSV file that load_voters can load.'''
+
+    help = 'Write a CSV file of made-up voters in the layout of the Newton voter file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('filename', help='CSV file to write')
+        parser.add_argument('--rows', type=int, default=100_000,
+                            help='how many voters to write (10,000 to 10,000,000 is typical)')
+        parser.add_argument('--seed', type=int, default=412,
+                            help='random seed; the same seed and rows give the same file')
+
+    def handle(self, *args, **options):
+        if options['rows'] < 1:
+            raise CommandError('--rows must be at least 1')
+        if options['rows'] > 99_999_999:
+            raise CommandError('--rows must fit in an 8 digit Voter ID Number')
+
+        start = time.perf_counter()
+        try:
+            write_csv(options['filename'], options['rows'], options['seed'])
+        except OSError as error:
+            raise CommandError(f"Can't write {options['filename']}: {error}")
+        seconds = time.perf_counter() - start
+
+        self.stdout.write(f"Wrote {options['rows']:,} voters to {options['filename']} "
+                          f"in {seconds:.1f}s")
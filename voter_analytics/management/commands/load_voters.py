@@ -0,0 +1,64 @@
+# voter_analytics/management/commands/load_voters.py
+# Made by Annelise Schreiber, aschreib@bu.edu
+# Sunday, October 18, 2026
+# Description: manage.py command to load the voter CSV file into the database
+
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from voter_analytics.ingest import (DEFAULT_BATCH_SIZE, MAX_REPORTED_ERRORS,
+                                    ErrorReport, bulk_load, incremental_load)
+
+
+class Command(BaseCommand):
+    '''Load the voter CSV file with batched inserts in one transaction.'''
+
+    help = 'Load the voter CSV file into the Voter table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('filename', nargs='?', default=None,
+                            help='CSV file to load (default: settings.VOTER_DATA_FILE)')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='rows per bulk INSERT')
+        parser.add_argument('--max-errors', type=int, default=MAX_REPORTED_ERRORS,
+                            help='how many bad rows to show in the error report')
+        parser.add_argument('--incremental', action='store_true',
+                            help='only apply the inserts, updates and deletes since the last load, '
+                                 'keeping primary keys of unchanged voters')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='parse the file in this many processes (0 = one per CPU core)')
+
+    def handle(self, *args, **options):
+        filename = options['filename'] or settings.VOTER_DATA_FILE
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        workers = options['workers'] or os.cpu_count() or 1
+        if workers < 0:
+            raise CommandError('--workers must not be negative')
+
+        errors = ErrorReport(limit=options['max_errors'])
+        load = incremental_load if options['incremental'] else bulk_load
+        try:
+            result = load(filename, batch_size=options['batch_size'], errors=errors,
+                          workers=workers)
+        except FileNotFoundError:
+            raise CommandError(f'No such file: {filename}')
+
+        # report the bad rows, but only the first few of them
+        if errors:
+            self.stderr.write(f'Skipped {errors.count} bad rows:')
+            for line_num, row, message in errors.samples:
+                self.stderr.write(f'  line {line_num}: {message} -- {",".join(row)}')
+            if errors.count > len(errors.samples):
+                self.stderr.write(f'  ... and {errors.count - len(errors.samples)} more')
+
+        if options['incremental']:
+            self.stdout.write(f'Updated {result.updated}, deleted {result.deleted}, '
+                              f'unchanged {result.unchanged}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Done. Created {result.rows} Results in {result.total_seconds:.2f}s: '
+            f'{result.seconds:.2f}s loading the file ({result.rows_per_second:,.0f} rows/s), '
+            f'{result.refresh_seconds:.2f}s rebuilding the derived tables'))
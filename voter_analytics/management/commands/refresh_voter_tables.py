@@ -0,0 +1,21 @@
+# voter_analytics/management/commands/refresh_voter_tables.py
+# Made by Annelise Schreiber, aschreib@bu.edu
+# Sunday, October 18, 2026
+# Description: manage.py command to rebuild the tables computed from Voter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from voter_analytics.ingest import refresh_derived_tables
+
+
+class Command(BaseCommand):
+    '''Rebuild the derived voter tables without reloading the CSV file,
+    e.g. after editing voters in the admin.'''
+
+    help = 'Rebuild the summary tables computed from Voter.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            refresh_derived_tables()
+        self.stdout.write(self.style.SUCCESS('Done. Rebuilt the derived voter tables.'))
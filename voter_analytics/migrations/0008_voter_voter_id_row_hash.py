@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voter_analytics', '0007_alter_voter_precinct_num'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='voter',
+            name='row_hash',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+        migrations.AddField(
+            model_name='voter',
+            name='voter_id',
+            field=models.TextField(blank=True, db_index=True, default=''),
+        ),
+    ]
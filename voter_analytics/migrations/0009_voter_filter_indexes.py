@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voter_analytics', '0008_voter_voter_id_row_hash'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='voter',
+            index=models.Index(fields=['last_name', 'first_name'], name='voter_last_first_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='voter',
+            index=models.Index(fields=['street_name', 'street_num'], name='voter_street_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='voter',
+            index=models.Index(fields=['zip_code'], name='voter_zip_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='voter',
+            index=models.Index(fields=['precinct_num'], name='voter_precinct_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='voter',
+            index=models.Index(fields=['dob'], name='voter_dob_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='voter',
+            index=models.Index(fields=['party_aff', 'dob'], name='voter_party_dob_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='voter',
+            index=models.Index(fields=['voter_score', 'party_aff'], name='voter_score_party_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='voter',
+            index=models.Index(fields=['v20state', 'v21town', 'v21primary', 'v22general', 'v23town'], name='voter_elections_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voter_analytics', '0009_voter_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VoterSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('party_aff', models.CharField(max_length=2)),
+                ('birth_year', models.IntegerField()),
+                ('voter_score', models.IntegerField()),
+                ('zip_code', models.IntegerField(blank=True, null=True)),
+                ('precinct_num', models.TextField(blank=True, null=True)),
+                ('v20state', models.BooleanField()),
+                ('v21town', models.BooleanField()),
+                ('v21primary', models.BooleanField()),
+                ('v22general', models.BooleanField()),
+                ('v23town', models.BooleanField()),
+                ('count', models.IntegerField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['zip_code', 'party_aff', 'birth_year'], name='summary_zip_party_year_idx'), models.Index(fields=['precinct_num'], name='summary_precinct_idx')],
+            },
+        ),
+    ]
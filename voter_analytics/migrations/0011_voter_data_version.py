@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voter_analytics', '0010_voter_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VoterDataVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.IntegerField(default=0)),
+                ('loaded_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Full-text search indexes for voter names and addresses (SQLite only)
+
+from django.db import migrations
+
+CREATE_TABLES = [
+    '''CREATE VIRTUAL TABLE voter_fts USING fts5(
+           first_name, last_name, street_num, street_name,
+           content='voter_analytics_voter', content_rowid='id',
+           tokenize='unicode61', prefix='2 3')''',
+    "CREATE VIRTUAL TABLE voter_fts_words USING fts5vocab(voter_fts, 'row')",
+    "CREATE VIRTUAL TABLE voter_fts_trigrams USING fts5(word, tokenize='trigram', detail='none')",
+    # index the voters that are already loaded
+    "INSERT INTO voter_fts(voter_fts) VALUES('rebuild')",
+    'INSERT INTO voter_fts_trigrams(word) SELECT term FROM voter_fts_words',
+]
+
+DROP_TABLES = [
+    'DROP TABLE IF EXISTS voter_fts_trigrams',
+    'DROP TABLE IF EXISTS voter_fts_words',
+    'DROP TABLE IF EXISTS voter_fts',
+]
+
+
+def run_on_sqlite(statements):
+    '''Other databases search without the FTS5 indexes.'''
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == 'sqlite':
+            for statement in statements:
+                schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voter_analytics', '0011_voter_data_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_sqlite(CREATE_TABLES), run_on_sqlite(DROP_TABLES)),
+    ]
@@ -0,0 +1,192 @@
+# Move party_aff, precinct_num, street_name and zip_code of Voter (and the
+# VoterSummary cube) into lookup tables, keeping only small integer ids
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+# column -> (lookup model, its value field)
+ENCODED = {
+    'party_aff': ('Party', 'code'),
+    'precinct_num': ('Precinct', 'name'),
+    'street_name': ('Street', 'name'),
+    'zip_code': ('ZipCode', 'code'),
+}
+SUMMARY_ENCODED = ['party_aff', 'precinct_num', 'zip_code']
+
+# the old columns, made nullable before they are removed: unapplying the
+# migration adds them back empty, and decode_columns fills them in
+OLD_FIELDS = {
+    'party_aff': models.CharField(max_length=2, null=True),
+    'precinct_num': models.TextField(null=True),
+    'street_name': models.TextField(null=True),
+    'zip_code': models.IntegerField(null=True),
+}
+
+# the indexes that include an encoded column, dropped while it is rebuilt
+VOTER_INDEXES = [
+    models.Index(fields=['street_name', 'street_num'], name='voter_street_idx'),
+    models.Index(fields=['zip_code'], name='voter_zip_idx'),
+    models.Index(fields=['precinct_num'], name='voter_precinct_idx'),
+    models.Index(fields=['party_aff', 'dob'], name='voter_party_dob_idx'),
+    models.Index(fields=['voter_score', 'party_aff'], name='voter_score_party_idx'),
+]
+SUMMARY_INDEXES = [
+    models.Index(fields=['zip_code', 'party_aff', 'birth_year'], name='summary_zip_party_year_idx'),
+    models.Index(fields=['precinct_num'], name='summary_precinct_idx'),
+]
+
+
+def encode_columns(apps, schema_editor):
+    '''Fill the lookup tables with every value in use, then point the new
+    id columns at them.'''
+    Voter = apps.get_model('voter_analytics', 'Voter')
+    VoterSummary = apps.get_model('voter_analytics', 'VoterSummary')
+
+    for column, (model_name, value_field) in ENCODED.items():
+        Lookup = apps.get_model('voter_analytics', model_name)
+        values = set(Voter.objects.values_list(column, flat=True).distinct())
+        if column in SUMMARY_ENCODED:
+            values |= set(VoterSummary.objects.exclude(**{f'{column}__isnull': True})
+                                              .values_list(column, flat=True).distinct())
+        Lookup.objects.bulk_create([Lookup(**{value_field: value}) for value in values])
+
+        lookup_id = Subquery(Lookup.objects.filter(**{value_field: OuterRef(column)}).values('id')[:1])
+        Voter.objects.update(**{f'{column}_code': lookup_id})
+        if column in SUMMARY_ENCODED:
+            VoterSummary.objects.update(**{f'{column}_code': lookup_id})
+
+
+def decode_columns(apps, schema_editor):
+    '''Put the values back into the old text and number columns.'''
+    Voter = apps.get_model('voter_analytics', 'Voter')
+    VoterSummary = apps.get_model('voter_analytics', 'VoterSummary')
+
+    for column, (model_name, value_field) in ENCODED.items():
+        Lookup = apps.get_model('voter_analytics', model_name)
+        value = Subquery(Lookup.objects.filter(id=OuterRef(f'{column}_code')).values(value_field)[:1])
+        Voter.objects.update(**{column: value})
+        if column in SUMMARY_ENCODED:
+            VoterSummary.objects.update(**{column: value})
+
+
+# the full-text index read street_name straight from the Voter table; now
+# it keeps no copy of the text at all (contentless) and is filled with a join
+CONTENTLESS_TEXT_SEARCH = [
+    'DROP TABLE IF EXISTS voter_fts_trigrams',
+    'DROP TABLE IF EXISTS voter_fts_words',
+    'DROP TABLE IF EXISTS voter_fts',
+    '''CREATE VIRTUAL TABLE voter_fts USING fts5(
+           first_name, last_name, street_num, street_name,
+           content='', tokenize='unicode61', prefix='2 3')''',
+    "CREATE VIRTUAL TABLE voter_fts_words USING fts5vocab(voter_fts, 'row')",
+    "CREATE VIRTUAL TABLE voter_fts_trigrams USING fts5(word, tokenize='trigram', detail='none')",
+    '''INSERT INTO voter_fts(rowid, first_name, last_name, street_num, street_name)
+           SELECT voter.id, voter.first_name, voter.last_name, voter.street_num, street.name
+           FROM voter_analytics_voter AS voter
+           JOIN voter_analytics_street AS street ON street.id = voter.street_name_id''',
+    'INSERT INTO voter_fts_trigrams(word) SELECT term FROM voter_fts_words',
+]
+
+EXTERNAL_CONTENT_TEXT_SEARCH = [
+    'DROP TABLE IF EXISTS voter_fts_trigrams',
+    'DROP TABLE IF EXISTS voter_fts_words',
+    'DROP TABLE IF EXISTS voter_fts',
+    '''CREATE VIRTUAL TABLE voter_fts USING fts5(
+           first_name, last_name, street_num, street_name,
+           content='voter_analytics_voter', content_rowid='id',
+           tokenize='unicode61', prefix='2 3')''',
+    "CREATE VIRTUAL TABLE voter_fts_words USING fts5vocab(voter_fts, 'row')",
+    "CREATE VIRTUAL TABLE voter_fts_trigrams USING fts5(word, tokenize='trigram', detail='none')",
+    "INSERT INTO voter_fts(voter_fts) VALUES('rebuild')",
+    'INSERT INTO voter_fts_trigrams(word) SELECT term FROM voter_fts_words',
+]
+
+
+def run_on_sqlite(statements):
+    '''Other databases search without the FTS5 indexes.'''
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == 'sqlite':
+            for statement in statements:
+                schema_editor.execute(statement)
+    return run
+
+
+def code_field(model_name, null=False):
+    return models.ForeignKey(to=f'voter_analytics.{model_name.lower()}', null=null, blank=null,
+                             db_index=False, on_delete=django.db.models.deletion.PROTECT)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voter_analytics', '0013_voter_household_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Party',
+            fields=[
+                ('id', models.SmallAutoField(primary_key=True, serialize=False)),
+                ('code', models.CharField(max_length=2, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Precinct',
+            fields=[
+                ('id', models.SmallAutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=50, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Street',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=200, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ZipCode',
+            fields=[
+                ('id', models.SmallAutoField(primary_key=True, serialize=False)),
+                ('code', models.IntegerField(unique=True)),
+            ],
+        ),
+
+        # the old FTS index reads street_name from Voter, so it goes first
+        migrations.RunPython(run_on_sqlite(EXTERNAL_CONTENT_TEXT_SEARCH[:3]),
+                             run_on_sqlite(EXTERNAL_CONTENT_TEXT_SEARCH)),
+        *[migrations.RemoveIndex(model_name='voter', name=index.name) for index in VOTER_INDEXES],
+        *[migrations.RemoveIndex(model_name='votersummary', name=index.name) for index in SUMMARY_INDEXES],
+
+        # the old columns may be empty while the migration is unapplied
+        *[migrations.AlterField(model_name='voter', name=column, field=field)
+          for column, field in OLD_FIELDS.items()],
+        migrations.AlterField(model_name='votersummary', name='party_aff',
+                              field=OLD_FIELDS['party_aff']),
+
+        # new id columns next to the old ones, filled from the lookup tables
+        *[migrations.AddField(model_name='voter', name=f'{column}_code',
+                              field=code_field(model_name, null=True))
+          for column, (model_name, value_field) in ENCODED.items()],
+        *[migrations.AddField(model_name='votersummary', name=f'{column}_code',
+                              field=code_field(ENCODED[column][0], null=True))
+          for column in SUMMARY_ENCODED],
+        migrations.RunPython(encode_columns, decode_columns),
+
+        # then the id columns take the old names
+        *[migrations.RemoveField(model_name='voter', name=column) for column in ENCODED],
+        *[migrations.RemoveField(model_name='votersummary', name=column) for column in SUMMARY_ENCODED],
+        *[migrations.RenameField(model_name='voter', old_name=f'{column}_code', new_name=column)
+          for column in ENCODED],
+        *[migrations.RenameField(model_name='votersummary', old_name=f'{column}_code', new_name=column)
+          for column in SUMMARY_ENCODED],
+        *[migrations.AlterField(model_name='voter', name=column, field=code_field(model_name))
+          for column, (model_name, value_field) in ENCODED.items()],
+        migrations.AlterField(model_name='votersummary', name='party_aff', field=code_field('Party')),
+
+        *[migrations.AddIndex(model_name='voter', index=index) for index in VOTER_INDEXES],
+        *[migrations.AddIndex(model_name='votersummary', index=index) for index in SUMMARY_INDEXES],
+        migrations.RunPython(run_on_sqlite(CONTENTLESS_TEXT_SEARCH),
+                             run_on_sqlite(CONTENTLESS_TEXT_SEARCH[:3])),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voter_analytics', '0015_voter_participation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VoterSample',
+            fields=[
+                ('voter', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='sample', serialize=False, to='voter_analytics.voter')),
+                ('weight', models.FloatField()),
+                ('precinct_num', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, to='voter_analytics.precinct')),
+            ],
+        ),
+    ]
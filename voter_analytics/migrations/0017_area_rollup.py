@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voter_analytics', '0016_voter_sample'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AreaRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('voters', models.IntegerField()),
+                ('voter_score_total', models.IntegerField()),
+                ('v20state', models.IntegerField()),
+                ('v21town', models.IntegerField()),
+                ('v21primary', models.IntegerField()),
+                ('v22general', models.IntegerField()),
+                ('v23town', models.IntegerField()),
+                ('party_aff', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, to='voter_analytics.party')),
+                ('precinct_num', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, to='voter_analytics.precinct')),
+                ('zip_code', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, to='voter_analytics.zipcode')),
+            ],
+        ),
+    ]
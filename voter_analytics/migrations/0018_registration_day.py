@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voter_analytics', '0017_area_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegistrationDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('month', models.DateField()),
+                ('count', models.IntegerField()),
+                ('cumulative', models.IntegerField()),
+                ('party_aff', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, to='voter_analytics.party')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['month', 'party_aff', 'date', 'count', 'cumulative'], name='registration_day_month_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:23
+
+from django.db import migrations, models
+
+
+def clear_voter_summary(apps, schema_editor):
+    '''The old cube needs a voter score on every row and a birth year on
+    the per-area ones, so it is emptied before they come back. The next
+    load (or manage.py refresh_voter_tables) fills it in again.'''
+    VoterSummary = apps.get_model('voter_analytics', 'VoterSummary')
+    VoterSummary.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voter_analytics', '0018_registration_day'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='votersummary',
+            name='voter_score',
+        ),
+        migrations.AlterField(
+            model_name='votersummary',
+            name='birth_year',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        # the rows already in the cube stay correct (the voter score follows
+        # from the flags); only unapplying the migration has to clear them
+        migrations.RunPython(migrations.RunPython.noop, clear_voter_summary),
+    ]
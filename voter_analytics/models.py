@@ -4,9 +4,46 @@
 # Description: making/defining the Profile model for voter_analytics application
 
 from django.db import models
-from datetime import datetime
 
 # Create your models here.
+
+# Lookup tables for the Voter columns that repeat a few values in every row.
+# Voter stores a small integer id instead of the text; the str() of a lookup
+# row is the original value, so {{ voter.party_aff }} still shows 'D '.
+# Rows are only ever added (by the loaders), never changed.
+
+class Party(models.Model):
+    '''A party affiliation code, like 'D ' or 'R ' (2 characters wide).'''
+    id = models.SmallAutoField(primary_key=True)
+    code = models.CharField(max_length=2, unique=True)
+
+    def __str__(self):
+        return self.code
+
+class Precinct(models.Model):
+    '''A precinct number, like '3B'.'''
+    id = models.SmallAutoField(primary_key=True)
+    name = models.CharField(max_length=50, unique=True)
+
+    def __str__(self):
+        return self.name
+
+class Street(models.Model):
+    '''A street name, like 'BEACON ST'.'''
+    id = models.AutoField(primary_key=True)
+    name = models.CharField(max_length=200, unique=True)
+
+    def __str__(self):
+        return self.name
+
+class ZipCode(models.Model):
+    '''A zip code (stored as a number, without its leading zero).'''
+    id = models.SmallAutoField(primary_key=True)
+    code = models.IntegerField(unique=True)
+
+    def __str__(self):
+        return str(self.code)
+
 class Voter(models.Model):
     '''
     Store/represent the data from registered voters from Newton, MA.
@@ -16,16 +53,17 @@ class Voter(models.Model):
     Party Affiliation (**note, this is a 2-character wide field**), Precinct Number
     '''
     # identification
+    voter_id = models.TextField(blank=True, default='', db_index=True) # Voter ID Number from the CSV file
     first_name = models.TextField()
     last_name = models.TextField()
     street_num = models.IntegerField()
-    street_name = models.TextField()
+    street_name = models.ForeignKey(Street, on_delete=models.PROTECT, db_index=False)
     apt_num = models.TextField(max_length=50, blank=True, null=True)
-    zip_code = models.IntegerField()
+    zip_code = models.ForeignKey(ZipCode, on_delete=models.PROTECT, db_index=False)
     dob = models.DateField()
     date_registration = models.DateField()
-    party_aff = models.CharField(max_length=2)
-    precinct_num = models.TextField()
+    party_aff = models.ForeignKey(Party, on_delete=models.PROTECT, db_index=False)
+    precinct_num = models.ForeignKey(Precinct, on_delete=models.PROTECT, db_index=False)
 
     # how many of recent elections they voted in
     v20state = models.BooleanField(default=False)
@@ -36,52 +74,163 @@ class Voter(models.Model):
 
     # indicating how many of the past 5 elections the voter participated in
     voter_score = models.IntegerField(default=0)
+    # the five flags above as the bits of one number, 0-31 (see
+    # voter_csv.participation_mask), for participation pattern searches
+    participation = models.SmallIntegerField(default=0)
+
+    # everyone at the same address has the same key (see voter_csv.household_key)
+    household_key = models.TextField(blank=True, default='', db_index=True)
+
+    # fingerprint of the CSV row, used to spot changed records on an incremental load
+    row_hash = models.CharField(max_length=32, blank=True, default='')
+
 
+    class Meta:
+        '''Indexes for the filters on the voter list and graphs pages.'''
+        indexes = [
+            # name and address lookups
+            models.Index(fields=['last_name', 'first_name'], name='voter_last_first_idx'),
+            models.Index(fields=['street_name', 'street_num'], name='voter_street_idx'),
+            models.Index(fields=['zip_code'], name='voter_zip_idx'),
+            models.Index(fields=['precinct_num'], name='voter_precinct_idx'),
+            # the search form: party, birth year range and voter score
+            models.Index(fields=['dob'], name='voter_dob_idx'),
+            models.Index(fields=['party_aff', 'dob'], name='voter_party_dob_idx'),
+            models.Index(fields=['voter_score', 'party_aff'], name='voter_score_party_idx'),
+            # the election participation checkboxes
+            models.Index(fields=['v20state', 'v21town', 'v21primary', 'v22general', 'v23town'],
+                         name='voter_elections_idx'),
+            # "voted in exactly/at least these elections"
+            models.Index(fields=['participation'], name='voter_participation_idx'),
+        ]
 
     def __str__(self):
         '''Return a string representation of this model instance.'''
         return f'{self.first_name} {self.last_name}'
 
-def load_data():
-    '''Function to load data records from CSV file into the Django database.'''
-
-    # very dangerous line!
-    Voter.objects.all().delete()
-
-    filename = 'C:/Users/annel/django/newton_voters.csv'
-
-    f = open(filename, 'r') #open the file for reading
-
-    #discard headers:
-    f.readline() #do nothing with it
-
-    # read the entire file, one line at a time
-    for line in f:
-        
-        fields = line.split(',')
-        
-        try:
-            result = Voter(first_name = fields[2],
-                            last_name = fields[1],
-                            street_num = fields[3],
-                            street_name = fields[4],
-                            apt_num = fields[5],
-                            zip_code = fields[6],
-                            dob = datetime.strptime(fields[7], "%Y-%m-%d").date(),
-                            date_registration = datetime.strptime(fields[8], "%Y-%m-%d").date(),
-                            party_aff = fields[9],
-                            precinct_num = fields[10],
-                            v20state = fields[11].strip().upper() == 'TRUE',
-                            v21town = fields[12].strip().upper() == 'TRUE',
-                            v21primary = fields[13].strip().upper() == 'TRUE',
-                            v22general = fields[14].strip().upper() == 'TRUE',
-                            v23town = fields[15].strip().upper() == 'TRUE',
-                            voter_score = int(fields[16]))
-            result.save() #commit this result to the database
-            # print(f'Created result: {result}')
-        
-        except Exception as e:
-            print(f"Error processing line: {line}")
-            print(f"Error details: {e}")
-
-    print(f"Done. Created {len(Voter.objects.all())} Results")
+class VoterSummary(models.Model):
+    '''Count of voters for every combination of the values the search form
+    can filter on (a data cube). Rebuilt whenever the voter file is loaded,
+    so the graphs page can add up these rows instead of scanning Voter.
+
+    The cube is stored at two levels: citywide rows (zip_code and
+    precinct_num are null) by birth year, and rows with a zip code and
+    precinct but no birth year. There is no voter score: it is the number
+    of the five election flags that are set.'''
+
+    party_aff = models.ForeignKey(Party, on_delete=models.PROTECT, db_index=False)
+    birth_year = models.IntegerField(blank=True, null=True) # citywide rows only
+    zip_code = models.ForeignKey(ZipCode, on_delete=models.PROTECT, db_index=False,
+                                 blank=True, null=True)
+    precinct_num = models.ForeignKey(Precinct, on_delete=models.PROTECT, db_index=False,
+                                     blank=True, null=True)
+    v20state = models.BooleanField()
+    v21town = models.BooleanField()
+    v21primary = models.BooleanField()
+    v22general = models.BooleanField()
+    v23town = models.BooleanField()
+
+    # how many voters have exactly these values
+    count = models.IntegerField()
+
+    class Meta:
+        '''Pick a level first (zip_code null or not), then the common filters.'''
+        indexes = [
+            models.Index(fields=['zip_code', 'party_aff', 'birth_year'], name='summary_zip_party_year_idx'),
+            models.Index(fields=['precinct_num'], name='summary_precinct_idx'),
+        ]
+
+    def __str__(self):
+        '''Return a string representation of this model instance.'''
+        return f'{self.count} voters: {self.party_aff} {self.birth_year} {self.precinct_num}'
+
+class VoterSample(models.Model):
+    '''A random sample of the voters, drawn separately in every precinct
+    (stratified), for approximate charts of very broad searches. Redrawn
+    whenever the voter file is loaded, in the same transaction, so it needs
+    no database constraint on the voter (Voter deletes stay fast).'''
+
+    voter = models.OneToOneField(Voter, on_delete=models.DO_NOTHING, db_constraint=False,
+                                 primary_key=True, related_name='sample')
+    # the stratum, and how many of its voters each sampled voter stands for
+    precinct_num = models.ForeignKey(Precinct, on_delete=models.PROTECT, db_index=False)
+    weight = models.FloatField()
+
+    def __str__(self):
+        '''Return a string representation of this model instance.'''
+        return f'{self.voter_id} (precinct {self.precinct_num_id}, weight {self.weight:.1f})'
+
+class AreaRollup(models.Model):
+    '''Totals for the voters of one party in one precinct, or in one zip
+    code (the other area is null), for the precinct and zip code overview.
+    Rebuilt from VoterSummary whenever the voter file is loaded, in the
+    same transaction, so the overview is one read of a few hundred rows.'''
+
+    zip_code = models.ForeignKey(ZipCode, on_delete=models.PROTECT, db_index=False,
+                                 blank=True, null=True)
+    precinct_num = models.ForeignKey(Precinct, on_delete=models.PROTECT, db_index=False,
+                                     blank=True, null=True)
+    party_aff = models.ForeignKey(Party, on_delete=models.PROTECT, db_index=False)
+
+    voters = models.IntegerField()
+    voter_score_total = models.IntegerField() # for the mean voter score
+
+    # how many of the voters took part in each election
+    v20state = models.IntegerField()
+    v21town = models.IntegerField()
+    v21primary = models.IntegerField()
+    v22general = models.IntegerField()
+    v23town = models.IntegerField()
+
+    def __str__(self):
+        '''Return a string representation of this model instance.'''
+        area = f'zip {self.zip_code}' if self.zip_code_id else f'precinct {self.precinct_num}'
+        return f'{area}, {self.party_aff}: {self.voters} voters'
+
+class RegistrationDay(models.Model):
+    '''How many voters of one party registered on one day, and how many of
+    that party had registered by the end of it, for the registration trend
+    chart. Rebuilt whenever the voter file is loaded, in the same
+    transaction, so a date range is an index range over a small table.'''
+
+    date = models.DateField()
+    month = models.DateField() # the first day of date's month, to group by
+    party_aff = models.ForeignKey(Party, on_delete=models.PROTECT, db_index=False)
+
+    count = models.IntegerField()
+    cumulative = models.IntegerField() # registrations of the party up to and including date
+
+    class Meta:
+        '''Rows come out of the index in (month, party) order, ready to be
+        grouped; the dates and counts come from the index too.'''
+        indexes = [
+            models.Index(fields=['month', 'party_aff', 'date', 'count', 'cumulative'],
+                         name='registration_day_month_idx'),
+        ]
+
+    def __str__(self):
+        '''Return a string representation of this model instance.'''
+        return f'{self.date} {self.party_aff}: {self.count} registered ({self.cumulative} in all)'
+
+class VoterDataVersion(models.Model):
+    '''A single row whose version goes up every time the voter data is
+    (re)loaded. Cached counts, pages and charts include the version in their
+    cache keys, so they go stale on their own when a new file lands.'''
+
+    version = models.IntegerField(default=0)
+    loaded_at = models.DateTimeField(auto_now=True) # time of the last load
+
+    def __str__(self):
+        '''Return a string representation of this model instance.'''
+        return f'voter data version {self.version} ({self.loaded_at})'
+
+def load_data(filename=None):
+    '''Function to load data records from CSV file into the Django database.
+    Same as running `python manage.py load_voters`.'''
+
+    from .ingest import bulk_load
+
+    result = bulk_load(filename)
+    print(f"Done. Created {result.rows} Results ({result.rows_per_second:,.0f} rows/s)")
+    if result.errors:
+        print(f"Skipped {result.errors.count} bad rows")
@@ -0,0 +1,134 @@
+# voter_analytics/pagination.py
+# Made by Annelise Schreiber, aschreib@bu.edu
+# Sunday, October 18, 2026
+# Description: keyset ("seek") pagination, so every page of a long result
+# list costs the same as the first one
+
+import base64
+from bisect import bisect_left, bisect_right
+
+from django.core.paginator import Paginator
+from django.http import Http404
+from django.utils.functional import cached_property
+
+from .counts import cached_count
+
+
+def encode_cursor(direction, pk):
+    '''Turn a direction ('after' or 'before') and a primary key into an
+    opaque string for the page links.'''
+    return base64.urlsafe_b64encode(f'{direction}:{pk}'.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    '''Undo encode_cursor. Raises Http404 for a cursor we didn't make.'''
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        direction, pk = base64.urlsafe_b64decode(padded.encode()).decode().split(':')
+        if direction not in ('after', 'before'):
+            raise ValueError(direction)
+        return direction, int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise Http404("Invalid page cursor")
+
+
+class KeysetPage:
+    '''One page of results ordered by primary key, with cursors for the
+    pages either side of it.'''
+
+    def __init__(self, object_list, next_cursor, previous_cursor, count=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.count = count # total number of results, if it was asked for
+        self.count_estimated = False
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def keyset_page(queryset, cursor, per_page, pks=None):
+    '''Return the KeysetPage of queryset that the cursor points at (the
+    first page if cursor is empty). Instead of OFFSET, each page seeks to
+    the primary key where the last one stopped, using the pk index. If the
+    sorted primary keys of the whole result are already known (pks, a list
+    or NumPy array), the page is cut out of them instead.'''
+
+    direction, pk = decode_cursor(cursor) if cursor else ('after', None)
+
+    if pks is not None:
+        # find the page within the known primary keys
+        if direction == 'after':
+            start = bisect_right(pks, pk) if pk is not None else 0
+            end = start + per_page
+        else:
+            end = bisect_left(pks, pk)
+            start = max(0, end - per_page)
+        page_pks = [int(key) for key in pks[start:end]]
+        rows = list(queryset.filter(pk__in=page_pks).order_by('pk'))
+        has_next, has_previous = end < len(pks), start > 0
+        page = make_page(rows, has_next, has_previous)
+        page.count = len(pks) # known for free
+        return page
+
+    rows = list(seek_queryset(queryset, direction, pk, per_page))
+    return seek_page(rows, direction, pk, per_page)
+
+
+async def akeyset_page(queryset, cursor, per_page):
+    '''keyset_page for async views: the same page, fetched with the async ORM.'''
+    direction, pk = decode_cursor(cursor) if cursor else ('after', None)
+    rows = [row async for row in seek_queryset(queryset, direction, pk, per_page)]
+    return seek_page(rows, direction, pk, per_page)
+
+
+def seek_queryset(queryset, direction, pk, per_page):
+    '''The rows of one page either side of pk, plus one extra row to find
+    out whether there is another page beyond them.'''
+    if direction == 'after':
+        if pk is not None:
+            queryset = queryset.filter(pk__gt=pk)
+        return queryset.order_by('pk')[:per_page + 1]
+    return queryset.filter(pk__lt=pk).order_by('-pk')[:per_page + 1]
+
+
+def seek_page(rows, direction, pk, per_page):
+    '''Build the KeysetPage from the rows fetched by seek_queryset.'''
+    more = len(rows) > per_page
+    if direction == 'after':
+        rows = rows[:per_page]
+        has_next, has_previous = more, pk is not None
+    else:
+        rows = rows[:per_page][::-1]
+        has_next, has_previous = True, more
+
+    return make_page(rows, has_next, has_previous)
+
+
+def make_page(rows, has_next, has_previous):
+    '''Build a KeysetPage with cursors pointing either side of rows.'''
+    next_cursor = encode_cursor('after', rows[-1].pk) if rows and has_next else None
+    previous_cursor = encode_cursor('before', rows[0].pk) if rows and has_previous else None
+    return KeysetPage(rows, next_cursor, previous_cursor)
+
+
+class CachedCountPaginator(Paginator):
+    '''Django's paginator for numbered pages, but the total comes from the
+    search count cache instead of a COUNT(*) on every page.'''
+
+    def __init__(self, object_list, per_page, search=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.search = search
+
+    @cached_property
+    def count(self):
+        '''Total number of results, across all pages.'''
+        if self.search is None:
+            return super().count
+        return cached_count(self.object_list, self.search)
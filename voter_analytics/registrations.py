@@ -0,0 +1,169 @@
+# voter_analytics/registrations.py
+# Made by Annelise Schreiber, aschreib@bu.edu
+# Sunday, October 18, 2026
+# Description: the voter registration trend: registrations per month and
+# running totals, optionally per party, read from the RegistrationDay table
+
+import calendar
+from datetime import date, timedelta
+from itertools import accumulate
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Max, Sum
+
+from .dataversion import data_version
+from .lookups import lookup_values
+from .models import RegistrationDay, Voter
+
+# how many RegistrationDay rows go into each bulk INSERT
+REGISTRATION_BATCH_SIZE = 5000
+
+# the label of the series when it isn't split by party
+ALL_PARTIES = 'all'
+
+
+def rebuild_registration_days():
+    '''Replace the RegistrationDay rows with registrations per (day, party),
+    counted in one grouped query, and running totals per party. Call this
+    inside the transaction that changed Voter.'''
+
+    RegistrationDay.objects.all().delete()
+
+    groups = (Voter.objects.order_by('party_aff', 'date_registration')
+                           .values_list('party_aff', 'date_registration')
+                           .annotate(count=Count('pk')))
+
+    def days():
+        totals = {}
+        for party, day, count in groups.iterator():
+            totals[party] = totals.get(party, 0) + count
+            yield RegistrationDay(date=day, month=day.replace(day=1), party_aff_id=party,
+                                  count=count, cumulative=totals[party])
+
+    RegistrationDay.objects.bulk_create(days(), batch_size=REGISTRATION_BATCH_SIZE)
+
+
+def parse_date_range(start, end):
+    '''The (first day, last day) of a range given as YYYY-MM-DD or YYYY-MM
+    strings (a month means all of it), either of which may be empty for an
+    open range. Raises ValueError for anything else.'''
+
+    def parse(value, last):
+        if not value:
+            return None
+        if len(value) == len('YYYY-MM'):
+            year, month = (int(part) for part in value.split('-'))
+            return date(year, month, calendar.monthrange(year, month)[1] if last else 1)
+        return date.fromisoformat(value)
+
+    start, end = parse(start, last=False), parse(end, last=True)
+    if start and end and start > end:
+        raise ValueError('the range ends before it starts')
+    return start, end
+
+
+def registration_counts(search, start, end):
+    '''({(month, party id): registrations between start and end},
+    {party id: registrations before start}) for the voters matching a
+    VoterSearch. Searches by party (or nothing) are answered from
+    RegistrationDay; anything else has to group Voter.'''
+
+    if not search.without('party_aff').values:
+        days = RegistrationDay.objects.filter(search.summary_q())
+        field, day, registrations, before = 'date', F('month'), Sum('count'), Max('cumulative')
+    else:
+        days = Voter.objects.filter(search.q())
+        field, day = 'date_registration', F('date_registration')
+        registrations = before = Count('pk')
+
+    def between(first, last):
+        '''Filters for the days from first to last (either may be None).
+        RegistrationDay is also narrowed by month, which its index starts with.'''
+        dates = {}
+        if first:
+            dates[f'{field}__gte'] = first
+        if last:
+            dates[f'{field}__lte'] = last
+        if days.model is RegistrationDay:
+            if first:
+                dates['month__gte'] = first.replace(day=1)
+            if last:
+                dates['month__lte'] = last.replace(day=1)
+        return dates
+
+    rows = (days.filter(**between(start, end)).order_by()
+                .values('party_aff', day=day)
+                .annotate(registrations=registrations))
+
+    counts = {}
+    for row in rows:
+        key = (row['day'].replace(day=1), row['party_aff'])
+        counts[key] = counts.get(key, 0) + row['registrations']
+
+    # the running totals start from everyone registered before the range
+    # (for RegistrationDay, the last running total of each party)
+    offsets = {}
+    if start:
+        offsets = dict(days.filter(**between(None, start - timedelta(days=1))).order_by()
+                           .values_list('party_aff').annotate(before))
+    return counts, offsets
+
+
+def month_range(first, last):
+    '''The first days of every month from first to last.'''
+    months = []
+    year, month = first.year, first.month
+    while (year, month) <= (last.year, last.month):
+        months.append(date(year, month, 1))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def registration_series(search, start=None, end=None, by_party=False):
+    '''Registrations per month for a VoterSearch, as {'months': ['1990-01',
+    ...], 'monthly': {label: [registrations]}, 'cumulative': {label: [voters
+    registered by the end of the month]}}, with every month from start (or
+    the first registration) to end (or the last), and one label per party
+    (by_party) or just 'all'. Cached per search, range and data version.'''
+
+    version, loaded_at = data_version()
+    cache_key = f'voter_analytics:registrations:{version}:{search.key}:{start}:{end}:{by_party}'
+
+    series = cache.get(cache_key)
+    if series is None:
+        counts, offsets = registration_counts(search, start, end)
+
+        parties = lookup_values('party_aff')
+        def label(party):
+            return parties[party] if by_party else ALL_PARTIES
+
+        first = start or min((month for month, party in counts), default=None)
+        last = end or max((month for month, party in counts), default=None)
+        months = month_range(first, last) if first and last else []
+        position = {month: index for index, month in enumerate(months)}
+
+        labels = {label(party) for month, party in counts} | {label(party) for party in offsets}
+        monthly = {name: [0] * len(months) for name in sorted(labels)}
+        for (month, party), registrations in counts.items():
+            monthly[label(party)][position[month]] += registrations
+
+        cumulative = {}
+        for name, registrations in monthly.items():
+            before = sum(voters for party, voters in offsets.items() if label(party) == name)
+            cumulative[name] = list(accumulate(registrations, initial=before))[1:]
+
+        series = {
+            'months': [month.strftime('%Y-%m') for month in months],
+            'monthly': monthly,
+            'cumulative': cumulative,
+        }
+        cache.set(cache_key, series, settings.VOTER_FIGURE_CACHE_TTL)
+    return series
+
+
+def party_search(search):
+    '''The part of a VoterSearch that RegistrationDay can answer: its party.
+    The graphs page charts the registrations of this part only, so its chart
+    never has to group the matching voters by day.'''
+    return search.without(*(name for name, value in search.items() if name != 'party_aff'))
@@ -0,0 +1,89 @@
+# voter_analytics/rollup.py
+# Made by Annelise Schreiber, aschreib@bu.edu
+# Sunday, October 18, 2026
+# Description: the AreaRollup table behind the precinct and zip code
+# overview: voters, party mix, mean voter score and turnout of every area
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Sum
+
+from .charts import voted_in
+from .dataversion import data_version
+from .lookups import lookup_values
+from .models import AreaRollup, VoterSummary
+from .voter_csv import ELECTION_FIELDS
+
+# the kinds of area in the overview, as their Voter fields
+AREA_FIELDS = ['precinct_num', 'zip_code']
+
+
+def rebuild_area_rollup():
+    '''Replace the AreaRollup rows with totals per (area, party), added up
+    from the per-area rows of VoterSummary. Call this inside the
+    transaction that changed Voter, after rebuild_voter_summary.'''
+
+    AreaRollup.objects.all().delete()
+
+    weight = F('count')
+    for area in AREA_FIELDS:
+        groups = (VoterSummary.objects.filter(zip_code__isnull=False)
+                                      .order_by()
+                                      .values(area, 'party_aff')
+                                      .annotate(voters=Sum(weight),
+                                                **{election: voted_in(election, weight)
+                                                   for election in ELECTION_FIELDS}))
+
+        # a voter's score is the number of elections they voted in, so the
+        # scores add up to the votes in all of the elections
+        AreaRollup.objects.bulk_create(
+            AreaRollup(**{f'{area}_id': group.pop(area), 'party_aff_id': group.pop('party_aff')},
+                       voter_score_total=sum(group[election] for election in ELECTION_FIELDS),
+                       **group)
+            for group in groups)
+
+
+def area_rollups():
+    '''{'precinct_num': [...], 'zip_code': [...]}: one dict per area, sorted
+    by name, like {'name': '3B', 'voters': 1234, 'parties': {'D ': 567, ...},
+    'mean_score': 2.41, 'turnout': {'v20state': 0.81, ...}}. Read from
+    AreaRollup and cached per voter data version.'''
+
+    version, loaded_at = data_version()
+    key = f'voter_analytics:area_rollups:{version}'
+
+    rollups = cache.get(key)
+    if rollups is None:
+        parties = lookup_values('party_aff')
+        names = {area: lookup_values(area) for area in AREA_FIELDS}
+        areas = {area: {} for area in AREA_FIELDS}
+
+        for row in AreaRollup.objects.order_by():
+            area = 'zip_code' if row.zip_code_id else 'precinct_num'
+            name = names[area][getattr(row, f'{area}_id')]
+            totals = areas[area].setdefault(name, {
+                'name': str(name), 'voters': 0, 'voter_score_total': 0, 'parties': {},
+                'voted': dict.fromkeys(ELECTION_FIELDS, 0),
+            })
+            totals['voters'] += row.voters
+            totals['voter_score_total'] += row.voter_score_total
+            totals['parties'][parties[row.party_aff_id]] = row.voters
+            for election in ELECTION_FIELDS:
+                totals['voted'][election] += getattr(row, election)
+
+        rollups = {}
+        for area, totals_by_name in areas.items():
+            rollups[area] = []
+            for name in sorted(totals_by_name):
+                totals = totals_by_name[name]
+                voters = totals['voters']
+                rollups[area].append({
+                    'name': totals['name'],
+                    'voters': voters,
+                    'parties': dict(sorted(totals['parties'].items())),
+                    'mean_score': round(totals['voter_score_total'] / voters, 2),
+                    'turnout': {election: round(voted / voters, 4)
+                                for election, voted in totals['voted'].items()},
+                })
+        cache.set(key, rollups, settings.VOTER_COUNT_CACHE_TTL)
+    return rollups
@@ -0,0 +1,161 @@
+# voter_analytics/sampling.py
+# Made by Annelise Schreiber, aschreib@bu.edu
+# Sunday, October 18, 2026
+# Description: a random sample of the voters, drawn separately in every
+# precinct, and chart series estimated from it (with 95% confidence
+# intervals) for searches that match most of the table
+
+import math
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.db.models.functions import ExtractYear
+
+from .dataversion import data_version
+from .lookups import lookup_values
+from .models import Voter, VoterSample
+from .voter_csv import ELECTION_FIELDS, PARTICIPATION_PATTERNS
+
+# every precinct gets at least this many sampled voters (or all of them),
+# so a small precinct doesn't make the intervals useless
+MIN_PRECINCT_SAMPLE = 30
+
+# normal quantile for 95% confidence intervals
+CONFIDENCE_Z = 1.96
+
+# how many sample rows go into each bulk INSERT
+SAMPLE_BATCH_SIZE = 5000
+
+
+def rebuild_voter_sample(size=None, rng=None):
+    '''Replace VoterSample with a fresh stratified sample of about `size`
+    voters (settings.VOTER_SAMPLE_SIZE): each precinct gets a share of the
+    sample proportional to its number of voters, drawn by reservoir
+    sampling, so only the sample is held in memory. Call this inside the
+    transaction that changed Voter.'''
+
+    if size is None:
+        size = settings.VOTER_SAMPLE_SIZE
+    if rng is None:
+        rng = random.Random()
+
+    VoterSample.objects.all().delete()
+
+    voters = dict(Voter.objects.order_by().values_list('precinct_num').annotate(Count('pk')))
+    total = sum(voters.values())
+    if not total or size < 1:
+        return
+    wanted = {precinct: min(count, max(MIN_PRECINCT_SAMPLE, round(size * count / total)))
+              for precinct, count in voters.items()}
+
+    samples = {precinct: [] for precinct in voters}
+    seen = dict.fromkeys(voters, 0)
+    rows = Voter.objects.order_by().values_list('pk', 'precinct_num').iterator(chunk_size=10000)
+    for pk, precinct in rows:
+        seen[precinct] += 1
+        sample = samples[precinct]
+        if len(sample) < wanted[precinct]:
+            sample.append(pk)
+        else:
+            # keep each voter seen so far with the same chance
+            slot = rng.randrange(seen[precinct])
+            if slot < wanted[precinct]:
+                sample[slot] = pk
+
+    VoterSample.objects.bulk_create(
+        (VoterSample(voter_id=pk, precinct_num_id=precinct, weight=voters[precinct] / len(pks))
+         for precinct, pks in samples.items() for pk in pks),
+        batch_size=SAMPLE_BATCH_SIZE)
+
+
+def sample_strata():
+    '''{precinct id: (voters, sampled voters)} of the current sample, cached
+    per voter data version. Empty until a sample has been drawn.'''
+    version, loaded_at = data_version()
+    key = f'voter_analytics:sample_strata:{version}'
+
+    strata = cache.get(key)
+    if strata is None:
+        rows = (VoterSample.objects.order_by().values('precinct_num')
+                                   .annotate(sampled=Count('pk'), weight=Max('weight')))
+        strata = {row['precinct_num']: (round(row['weight'] * row['sampled']), row['sampled'])
+                  for row in rows}
+        cache.set(key, strata, settings.VOTER_COUNT_CACHE_TTL)
+    return strata
+
+
+def estimate(hits, strata):
+    '''Estimate how many voters fall in a category, from how many sampled
+    voters of each precinct do ({precinct id: sampled voters}). Returns
+    (estimate, half-width of its 95% confidence interval), using the usual
+    stratified sampling variance with the finite population correction.'''
+    total = variance = 0.0
+    for precinct, (voters, sampled) in strata.items():
+        count = hits.get(precinct, 0)
+        total += voters * count / sampled
+        if sampled > 1:
+            share = count / sampled
+            variance += voters ** 2 * (1 - sampled / voters) * share * (1 - share) / (sampled - 1)
+    return total, CONFIDENCE_Z * math.sqrt(variance)
+
+
+def sampled_chart_series(search):
+    '''charts.chart_series for a VoterSearch, estimated from the sample in
+    one grouped query, plus 'approximate', 'sampled' (the matching sampled
+    voters) and 'intervals' ({series: {key: [low, high]}}). Returns None
+    when there is no sample, or when the search is estimated to match fewer
+    than settings.VOTER_SAMPLE_THRESHOLD voters: those get exact counts.'''
+
+    strata = sample_strata()
+    if not strata:
+        return None
+
+    # IN (the sample) makes SQLite look up each sampled voter by primary
+    # key, rather than walk all voters checking for a sample row
+    groups = (Voter.objects.filter(search.q(), pk__in=VoterSample.objects.values('voter'))
+                           .order_by()
+                           .values('precinct_num', 'party_aff', 'participation', year=ExtractYear('dob'))
+                           .annotate(sampled=Count('pk')))
+
+    # {series: {key: {precinct id: sampled voters}}}
+    hits = {'birth_year': {}, 'party': {}, 'elections': {}, 'participation': {}}
+    matching = {}
+
+    def add(series, key, precinct, count):
+        per_precinct = hits[series].setdefault(key, {})
+        per_precinct[precinct] = per_precinct.get(precinct, 0) + count
+
+    for group in groups:
+        precinct, count = group['precinct_num'], group['sampled']
+        matching[precinct] = matching.get(precinct, 0) + count
+        add('birth_year', group['year'], precinct, count)
+        add('party', group['party_aff'], precinct, count)
+        add('participation', group['participation'], precinct, count)
+        for bit, election in enumerate(ELECTION_FIELDS):
+            if group['participation'] & (1 << bit):
+                add('elections', election, precinct, count)
+
+    matches = estimate(matching, strata)[0]
+    if matches < settings.VOTER_SAMPLE_THRESHOLD:
+        return None
+
+    # the same keys, in the same order, as the exact series
+    parties = lookup_values('party_aff')
+    keys = {
+        'birth_year': sorted(hits['birth_year']),
+        'party': list(hits['party']),
+        'elections': ELECTION_FIELDS,
+        'participation': range(PARTICIPATION_PATTERNS),
+    }
+    series = {'approximate': True, 'sampled': sum(matching.values()), 'intervals': {}}
+    for name, names in keys.items():
+        series[name] = {}
+        series['intervals'][name] = {}
+        for key in names:
+            count, margin = estimate(hits[name].get(key, {}), strata)
+            label = parties[key] if name == 'party' else key
+            series[name][label] = round(count)
+            series['intervals'][name][label] = [max(0, round(count - margin)), round(count + margin)]
+    return series
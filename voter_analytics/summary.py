@@ -0,0 +1,61 @@
+# voter_analytics/summary.py
+# Made by Annelise Schreiber, aschreib@bu.edu
+# Sunday, October 18, 2026
+# Description: building and querying the VoterSummary data cube
+
+from django.db.models import Count
+from django.db.models.functions import ExtractYear
+
+from .models import Voter, VoterSummary
+from .voter_csv import ELECTION_FIELDS
+
+# the Voter fields that make up the cube's dimensions; the dictionary-encoded
+# ones are grouped by their lookup ids. voter_score isn't one: it is the
+# number of elections voted in, so the five flags already give it.
+# The citywide rows also have the birth year, the per-area rows don't (with
+# it, there would be about as many area rows as voters)
+CITYWIDE_DIMENSIONS = ['party_aff_id', *ELECTION_FIELDS]
+AREA_DIMENSIONS = ['zip_code_id', 'precinct_num_id', 'party_aff_id', *ELECTION_FIELDS]
+
+# the search parameters only the citywide rows can answer
+YEAR_PARAMS = ['min_dob', 'max_dob']
+
+# how many cube rows go into each bulk INSERT
+SUMMARY_BATCH_SIZE = 5000
+
+
+def rebuild_voter_summary():
+    '''Replace the VoterSummary rows with fresh counts from Voter, using one
+    grouped query per level. Call this inside the transaction that changed
+    Voter.'''
+
+    VoterSummary.objects.all().delete()
+
+    citywide = (Voter.objects.order_by()
+                             .values(*CITYWIDE_DIMENSIONS, birth_year=ExtractYear('dob'))
+                             .annotate(count=Count('pk')))
+    by_area = (Voter.objects.order_by()
+                            .values(*AREA_DIMENSIONS)
+                            .annotate(count=Count('pk')))
+
+    for groups in [citywide, by_area]:
+        VoterSummary.objects.bulk_create((VoterSummary(**group) for group in groups.iterator()),
+                                         batch_size=SUMMARY_BATCH_SIZE)
+
+
+def summary_queryset(search, by_area=False, by_birth_year=False):
+    '''Return the VoterSummary rows matching a VoterSearch, or None when
+    the search uses a field the cube doesn't have and has to go to Voter.
+    by_area asks for the per-area rows even if the search doesn't filter
+    by zip code or precinct (to group by them), and by_birth_year for rows
+    with a birth year; a search that needs both can't use the cube.'''
+
+    summary_q = search.summary_q()
+    if summary_q is None:
+        return None
+
+    # only use the per-area rows when they are needed
+    by_area = by_area or search.uses('zip_code', 'precinct_num')
+    if by_area and (by_birth_year or search.uses(*YEAR_PARAMS)):
+        return None
+    return VoterSummary.objects.filter(summary_q, zip_code__isnull=not by_area)
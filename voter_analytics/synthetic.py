@@ -0,0 +1,94 @@
+# voter_analytics/synthetic.py
+# Made by Annelise Schreiber, aschreib@bu.edu
+# Sunday, October 18, 2026
+# Description: made-up voter records in the same column layout as the real
+# voter CSV file, for benchmarks that can't use the real Newton data
+
+import csv
+import random
+from datetime import date, timedelta
+
+from .voter_csv import ELECTION_FIELDS
+
+# party codes are 2 characters wide, like in the real file
+PARTIES = ['U ', 'D ', 'R ', 'L ', 'J ', 'CC', 'X ', 'Q ', 'GG']
+PARTY_WEIGHTS = [50, 38, 9, 1, 0.5, 0.5, 0.4, 0.3, 0.3]
+
+# the zip codes of Newton's villages (stored without the leading zero)
+ZIP_CODES = [2458, 2459, 2460, 2461, 2462, 2464, 2465, 2466, 2467, 2468]
+
+# 8 wards with 4 precincts each
+PRECINCTS = [f'{ward}{letter}' for ward in range(1, 9) for letter in 'ABCD']
+
+# chance that a voter who is "keen" takes part in each election; town
+# elections and primaries get far fewer voters than the state election
+ELECTION_TURNOUT = {'v20state': 0.92, 'v21town': 0.35, 'v21primary': 0.25,
+                    'v22general': 0.75, 'v23town': 0.30}
+
+SYLLABLES = ['an', 'ber', 'cal', 'dor', 'el', 'fitz', 'gar', 'hal', 'in', 'jo',
+             'ken', 'lo', 'mar', 'nel', 'or', 'pat', 'quin', 'ros', 'sul', 'tor',
+             'un', 'van', 'wal', 'yer', 'zim']
+STREET_TYPES = ['ST', 'AVE', 'RD', 'TER', 'PL', 'CIR', 'LN']
+HEADER = ['Voter ID Number', 'Last Name', 'First Name',
+          'Residential Address - Street Number', 'Residential Address - Street Name',
+          'Residential Address - Apartment Number', 'Residential Address - Zip Code',
+          'Date of Birth', 'Date of Registration', 'Party Affiliation',
+          'Precinct Number', *ELECTION_FIELDS, 'voter_score']
+
+
+def make_word(rng, syllables):
+    '''Glue together a few syllables into a name.'''
+    return ''.join(rng.choice(SYLLABLES) for i in range(syllables)).upper()
+
+
+def generate_rows(count, seed=412):
+    '''Generator that yields `count` made-up voter rows, each a list of
+    strings laid out exactly like a line of the voter CSV file.'''
+
+    rng = random.Random(seed)
+
+    # a fixed pool of names and streets, so values repeat like in real data
+    last_names = [make_word(rng, rng.choice([2, 3])) for i in range(5000)]
+    first_names = [make_word(rng, 2) for i in range(800)]
+    streets = [f'{make_word(rng, 2)} {rng.choice(STREET_TYPES)}' for i in range(600)]
+    street_zip = {street: rng.choice(ZIP_CODES) for street in streets}
+    zip_precincts = {zip_code: rng.sample(PRECINCTS, 4) for zip_code in ZIP_CODES}
+
+    today = date(2024, 1, 1)
+    for i in range(count):
+        street = rng.choice(streets)
+        zip_code = street_zip[street]
+
+        # ages 18 to 100, with more voters in middle age
+        age = int(rng.triangular(18, 100, 45))
+        dob = today - timedelta(days=age * 365 + rng.randrange(365))
+        eighteen = dob + timedelta(days=18 * 365)
+        registered = eighteen + timedelta(days=rng.randrange(max(1, (today - eighteen).days)))
+
+        # some voters are keen, some hardly ever vote
+        keenness = rng.betavariate(2, 1.5)
+        votes = [rng.random() < keenness * ELECTION_TURNOUT[election]
+                 for election in ELECTION_FIELDS]
+
+        yield [f'{i + 1:08d}',
+               rng.choice(last_names),
+               rng.choice(first_names),
+               str(rng.randint(1, 400)),
+               street,
+               rng.choice(['', '', '', '', '1', '2', '3', '2B']),
+               str(zip_code),
+               dob.isoformat(),
+               registered.isoformat(),
+               rng.choices(PARTIES, PARTY_WEIGHTS)[0],
+               rng.choice(zip_precincts[zip_code]),
+               *['TRUE' if vote else 'FALSE' for vote in votes],
+               str(sum(votes))]
+
+
+def write_csv(filename, count, seed=412):
+    '''Write a voter CSV file of `count` made-up voters (with the header
+    line), which load_data() and manage.py load_voters can load.'''
+    with open(filename, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(HEADER)
+        writer.writerows(generate_rows(count, seed))
@@ -1,3 +1,815 @@
-from django.test import TestCase
+# voter_analytics/tests.py
+# Made by Annelise Schreiber, aschreib@bu.edu
+# Sunday, October 18, 2026
+# Description: query plan regression tests: every search the voter list and
+# graphs pages support is run, and the plans of the queries they send must
+# not pick up table scans or temporary sorts that query_plans.json lacks,
+# nor scan the voter table unless INTENTIONAL_FULL_SCANS says why.
+# Also tests of the text search, which the plans alone don't check, of the
+# parallel CSV reader, the incremental loader and keyset pagination, and of
+# the derived tables and caches against the Voter rows they come from.
+#
+# After a change that is meant to alter the plans, record them again with
+#   UPDATE_QUERY_PLANS=1 python manage.py test voter_analytics
 
-# Create your tests here.
+import csv
+import difflib
+import gzip
+import json
+import os
+import random
+import re
+import tempfile
+import unittest
+from collections import Counter
+from itertools import accumulate, combinations
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Avg, Count, Q, Sum
+from django.http import Http404
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .benchmarks import load_synthetic
+from .charts import chart_series, search_chart_series
+from .columnar import columnar_engine, np
+from .dataversion import bump_data_version
+from .crosstab import search_crosstab
+from .export import EXPORT_FIELDS
+from .filters import VOTER_FILTERS, VoterSearch
+from .fulltext import ranked_pks, text_search_available
+from .ingest import ErrorReport, bulk_load, incremental_load, refresh_derived_tables, voter_rows
+from .lookups import LOOKUP_FIELDS
+from .models import Voter
+from .pagination import encode_cursor, keyset_page
+from .registrations import parse_date_range, registration_series
+from .rollup import AREA_FIELDS, area_rollups
+from .sampling import rebuild_voter_sample, sampled_chart_series
+from .summary import summary_queryset
+from .synthetic import generate_rows, write_csv
+from .voter_csv import ELECTION_FIELDS, household_key
+
+# the recorded plans, one list of lines per (page, search)
+PLANS_FILE = os.path.join(os.path.dirname(__file__), 'query_plans.json')
+
+# made-up voters in the test database, enough for ANALYZE to give the
+# planner realistic statistics
+PLAN_TEST_ROWS = 5000
+
+# the pages whose queries are checked, and any extra GET parameters
+PAGES = [
+    ('records', '/voter_analytics/', {}),
+    ('records counted', '/voter_analytics/', {'count': '1'}),
+    ('graphs', '/voter_analytics/graphs', {}),
+]
+
+# parameters people combine on the search form; each pair is checked
+COMBINED_PARAMS = ['q', 'party_aff', 'min_dob', 'max_dob', 'dob', 'voter_score',
+                   'v20state', 'voted_at_least', 'zip_code', 'precinct_num']
+
+# plan lines that read a whole table or sort into a temporary table
+SLOW_STEP = re.compile(r'^(SCAN (?!CONSTANT ROW)(?!.*VIRTUAL TABLE)|USE TEMP B-TREE)')
+
+# plan lines that read all of Voter, or all of one of its indexes
+FULL_SCAN = re.compile(r'^SCAN voter_analytics_voter( |$)')
+
+ELECTION_SCAN = 'an election flag matches about half the voters, so reading them all is the plan'
+UNINDEXED_SCAN = 'no index for it on its own; the q text search covers names and addresses'
+SMALL_TABLE_SCAN = ('the participation patterns of the matching pks: on the small test table '
+                    'SQLite reads the whole participation index instead of looking them up')
+
+# the searches (on every page, or on one like 'graphs: zip_code') allowed
+# to scan Voter, and why. Any other search whose plan has a FULL_SCAN line
+# fails, even if query_plans.json recorded it
+INTENTIONAL_FULL_SCANS = {
+    'no filters': 'every voter matches',
+    'all elections': ELECTION_SCAN,
+    'v20state': ELECTION_SCAN,
+    'v21town': ELECTION_SCAN,
+    'v21primary': ELECTION_SCAN,
+    'v22general': ELECTION_SCAN,
+    'v23town': ELECTION_SCAN,
+    'first_name': UNINDEXED_SCAN,
+    'street_num': UNINDEXED_SCAN,
+    'apt_num': UNINDEXED_SCAN,
+    'graphs: zip_code': SMALL_TABLE_SCAN,
+    'graphs: precinct_num': SMALL_TABLE_SCAN,
+    'graphs: party_aff + zip_code': SMALL_TABLE_SCAN,
+    'graphs: min_dob + zip_code': SMALL_TABLE_SCAN,
+    'graphs: min_dob + precinct_num': SMALL_TABLE_SCAN,
+    'graphs: max_dob + zip_code': SMALL_TABLE_SCAN,
+    'graphs: max_dob + precinct_num': SMALL_TABLE_SCAN,
+    'graphs: v20state + zip_code': SMALL_TABLE_SCAN,
+}
+
+
+def search_params(voter):
+    '''A value for every search parameter, taken from one voter so that
+    every filter matches someone.'''
+    params = {
+        'first_name': voter.first_name,
+        'last_name': voter.last_name,
+        'street_num': str(voter.street_num),
+        'street_name': voter.street_name.name,
+        'apt_num': voter.apt_num or '1',
+        'zip_code': str(voter.zip_code.code),
+        'dob': voter.dob.isoformat(),
+        'min_dob': '1960',
+        'max_dob': '1980',
+        'party_aff': voter.party_aff.code,
+        'voter_score': str(voter.voter_score),
+        'precinct_num': voter.precinct_num.name,
+        'q': voter.last_name.lower(),
+        'voted_exactly': 'v20state,v22general',
+        'voted_at_least': 'v21town',
+    }
+    for election in ELECTION_FIELDS:
+        params[election] = 'on'
+    return params
+
+
+def plan_cases(values):
+    '''(name, GET parameters) of every search checked: each parameter on
+    its own, "Other" parties, all elections, and pairs of form parameters.'''
+    cases = [('no filters', {})]
+    cases += [(name, {name: values[name]}) for name in values]
+    cases.append(('party_aff=not_rdu', {'party_aff': 'not_rdu'}))
+    cases.append(('all elections', {name: values[name] for name in ELECTION_FIELDS}))
+    cases += [(f'{first} + {second}', {first: values[first], second: values[second]})
+              for first, second in combinations(COMBINED_PARAMS, 2)]
+    return cases
+
+
+def explain(sql):
+    '''The EXPLAIN QUERY PLAN of a query as indented lines, one per step.'''
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        rows = cursor.fetchall()
+    depth = {0: -1}
+    lines = []
+    for step_id, parent, unused, detail in rows:
+        depth[step_id] = depth.get(parent, -1) + 1
+        lines.append('  ' * depth[step_id] + detail)
+    return lines
+
+
+def slow_steps(plan):
+    '''The scans and temporary sorts in a plan, counted.'''
+    return Counter(line.strip() for line in plan if SLOW_STEP.match(line.strip()))
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'query plans are recorded for SQLite')
+class QueryPlanTests(TestCase):
+    '''Runs each page for each search against a populated database and
+    compares the EXPLAIN QUERY PLAN of every SELECT it sends with the plans
+    recorded in query_plans.json.'''
+
+    @classmethod
+    def setUpTestData(cls):
+        load_synthetic(PLAN_TEST_ROWS)
+        refresh_derived_tables()
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def page_plan(self, url, params):
+        '''The plans of the SELECTs one cold request sends, in order.'''
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, f'{url} {params}')
+
+        plan = []
+        for number, query in enumerate(q for q in queries if q['sql'].startswith('SELECT')):
+            plan.append(f'query {number + 1}')
+            plan += ['  ' + line for line in explain(query['sql'])]
+        return plan
+
+    def test_query_plans(self):
+        voter = Voter.objects.select_related(*LOOKUP_FIELDS).order_by('pk').first()
+        values = search_params(voter)
+        # a new search parameter needs a value here to be checked
+        self.assertEqual(set(values), {search_filter.name for search_filter in VOTER_FILTERS})
+
+        plans = {}
+        for page, url, extra in PAGES:
+            for name, params in plan_cases(values):
+                plans[f'{page}: {name}'] = self.page_plan(url, {**params, **extra})
+
+        scanned = set()
+        for case, plan in plans.items():
+            search = case.split(': ', 1)[1]
+            if any(FULL_SCAN.match(line.strip()) for line in plan):
+                scanned |= {case, search}
+                with self.subTest(case):
+                    self.assertTrue(case in INTENTIONAL_FULL_SCANS or search in INTENTIONAL_FULL_SCANS,
+                                    'reads the whole voter table: add an index for it, '
+                                    'or list it in INTENTIONAL_FULL_SCANS')
+        # and the list doesn't outlive the scans
+        self.assertEqual(set(INTENTIONAL_FULL_SCANS) - scanned, set())
+
+        if os.environ.get('UPDATE_QUERY_PLANS'):
+            with open(PLANS_FILE, 'w') as file:
+                json.dump(plans, file, indent=1, sort_keys=True)
+                file.write('\n')
+            self.skipTest(f'recorded {len(plans)} query plans in {PLANS_FILE}')
+
+        with open(PLANS_FILE) as file:
+            expected = json.load(file)
+
+        for case, plan in plans.items():
+            with self.subTest(case):
+                self.assertIn(case, expected, 'no recorded plan: run with UPDATE_QUERY_PLANS=1')
+                new_steps = slow_steps(plan) - slow_steps(expected[case])
+                if new_steps:
+                    diff = difflib.unified_diff(expected[case], plan, 'recorded plan', 'plan now',
+                                                lineterm='')
+                    self.fail(f'{case} now does {", ".join(new_steps)}\n' + '\n'.join(diff))
+
+
+@unittest.skipUnless(text_search_available(), 'the full-text index is SQLite only')
+class TextSearchTests(TestCase):
+    '''The q parameter finds every matching voter, however many there are,
+    so the other filters of a search apply to all of them.'''
+
+    @classmethod
+    def setUpTestData(cls):
+        load_synthetic(1000)
+        refresh_derived_tables()
+
+    @override_settings(VOTER_TEXT_SEARCH_LIMIT=5)
+    def test_q_with_other_filters(self):
+        voter = Voter.objects.select_related(*LOOKUP_FIELDS).order_by('pk').first()
+        word = voter.last_name.lower()[:2]
+        party = voter.party_aff.code
+        cache.clear()
+
+        text_only = Voter.objects.filter(VoterSearch({'q': word}).q())
+        combined = Voter.objects.filter(VoterSearch({'q': word, 'party_aff': party}).q())
+
+        # more matches than the (lowered) limit of the voter list
+        self.assertGreater(text_only.count(), 5)
+        self.assertEqual(combined.count(), text_only.filter(party_aff__code=party).count())
+        # a prefix of the last name is a match, whatever the fuzzy matching adds
+        self.assertGreaterEqual(combined.count(),
+                                Voter.objects.filter(last_name__istartswith=word,
+                                                     party_aff__code=party).count())
+
+        # the voter list shows the best few of them
+        ranked = ranked_pks(combined, word)
+        self.assertEqual(len(ranked), 5)
+        self.assertLessEqual(set(ranked), set(combined.values_list('pk', flat=True)))
+
+
+class ParallelReaderTests(SimpleTestCase):
+    '''The parallel CSV reader gives the same rows, line numbers and bad
+    rows as the serial one, however the file is split into chunks.'''
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.filename = os.path.join(tmp.name, 'voters.csv')
+        write_csv(self.filename, 2000)
+        with open(self.filename, 'a', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['99999', 'NO', 'STREET NUMBER', 'X'])
+            writer.writerows(generate_rows(10, seed=7))
+
+    def read(self, workers):
+        errors = ErrorReport()
+        rows = list(voter_rows(self.filename, errors, workers, numbered=True))
+        return rows, errors.count, errors.samples
+
+    def test_serial_and_parallel_agree(self):
+        serial = self.read(1)
+        self.assertEqual(len(serial[0]), 2010)
+        self.assertEqual(serial[1], 1)
+        # more chunks than the workers may have in flight at once
+        self.assertEqual(self.read(2), serial)
+        with mock.patch('voter_analytics.ingest.MAX_CHUNK_BYTES', 4096):
+            self.assertEqual(self.read(3), serial)
+
+
+class IncrementalLoadTests(TestCase):
+    '''An incremental load inserts, updates and deletes only what changed
+    in the file, and the voters that didn't change keep their primary keys.'''
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.filename = os.path.join(tmp.name, 'voters.csv')
+        write_csv(self.filename, 200)
+        bulk_load(self.filename)
+
+    def test_only_changes_are_applied(self):
+        with open(self.filename, newline='') as file:
+            header, *rows = csv.reader(file)
+        changed, dropped = rows[10], rows.pop(20)
+        changed[1] = 'NEWNAME'
+        added = list(rows[0])
+        added[0] = '99999999'
+        rows.append(added)
+        with open(self.filename, 'w', newline='') as file:
+            csv.writer(file).writerows([header, *rows])
+
+        pks = dict(Voter.objects.values_list('voter_id', 'pk'))
+        result = incremental_load(self.filename)
+
+        self.assertEqual((result.rows, result.updated, result.deleted, result.unchanged),
+                         (1, 1, 1, 198))
+        self.assertFalse(result.errors)
+        self.assertEqual(Voter.objects.count(), 200)
+        self.assertFalse(Voter.objects.filter(voter_id=dropped[0]).exists())
+        self.assertEqual(Voter.objects.get(voter_id=changed[0]).last_name, 'NEWNAME')
+        self.assertTrue(Voter.objects.filter(voter_id='99999999').exists())
+
+        # everyone still in the file has the same primary key as before
+        del pks[dropped[0]]
+        self.assertEqual({voter_id: pk for voter_id, pk in Voter.objects.values_list('voter_id', 'pk')
+                          if voter_id != '99999999'}, pks)
+
+        # a second run has nothing left to do
+        result = incremental_load(self.filename)
+        self.assertEqual((result.rows, result.updated, result.deleted, result.unchanged),
+                         (0, 0, 0, 200))
+
+
+class KeysetPaginationTests(TestCase):
+    '''Following the next cursors visits every result once, in order, and
+    the previous cursors walk the same pages back, with or without the
+    primary keys of the result being known up front.'''
+
+    PER_PAGE = 7
+
+    @classmethod
+    def setUpTestData(cls):
+        load_synthetic(100)
+
+    def walk(self, queryset, pks=None):
+        '''The pages from the first to the last and then back to the first,
+        as lists of primary keys.'''
+        page = keyset_page(queryset, '', self.PER_PAGE, pks)
+        self.assertFalse(page.has_previous())
+        forward = [[voter.pk for voter in page.object_list]]
+        while page.has_next():
+            page = keyset_page(queryset, page.next_cursor, self.PER_PAGE, pks)
+            forward.append([voter.pk for voter in page.object_list])
+
+        backward = [forward[-1]]
+        while page.has_previous():
+            page = keyset_page(queryset, page.previous_cursor, self.PER_PAGE, pks)
+            self.assertTrue(page.has_next())
+            backward.append([voter.pk for voter in page.object_list])
+        return forward, backward
+
+    def test_forward_and_back(self):
+        queryset = Voter.objects.filter(voter_score__gte=2)
+        expected = list(queryset.order_by('pk').values_list('pk', flat=True))
+        pages = [expected[start:start + self.PER_PAGE]
+                 for start in range(0, len(expected), self.PER_PAGE)]
+        self.assertGreater(len(pages), 2)
+
+        known_pks = [None, expected]
+        if np is not None:
+            known_pks.append(np.array(expected))
+        for pks in known_pks:
+            with self.subTest(pks=type(pks).__name__):
+                forward, backward = self.walk(queryset, pks)
+                self.assertEqual(forward, pages)
+                self.assertEqual(backward, pages[::-1])
+
+    def test_invalid_cursor(self):
+        for cursor in ('nonsense', encode_cursor('sideways', 1)):
+            with self.assertRaises(Http404):
+                keyset_page(Voter.objects.all(), cursor, self.PER_PAGE)
+
+
+def cube_searches(voter):
+    '''Searches the VoterSummary cube answers, with values from one voter:
+    citywide ones, ones by area and ones by voter score, which the cube
+    works out from the election flags.'''
+    party, zip_code, precinct = voter.party_aff.code, str(voter.zip_code.code), voter.precinct_num.name
+    return [
+        {},
+        {'party_aff': party},
+        {'party_aff': 'not_rdu'},
+        {'min_dob': '1960', 'max_dob': '1980', 'party_aff': party},
+        {'voter_score': '0'},
+        {'voter_score': '3', 'v21town': 'on'},
+        {'voted_exactly': 'v20state,v22general'},
+        {'zip_code': zip_code},
+        {'precinct_num': precinct, 'voter_score': '2'},
+        {'zip_code': zip_code, 'precinct_num': precinct, 'party_aff': party},
+    ]
+
+
+class SummaryCubeTests(TestCase):
+    '''Counts and charts added up from the VoterSummary cube are the same as
+    the ones counted from Voter.'''
+
+    @classmethod
+    def setUpTestData(cls):
+        load_synthetic(1000)
+        refresh_derived_tables()
+
+    def test_counts_and_series(self):
+        voter = Voter.objects.select_related(*LOOKUP_FIELDS).order_by('pk').first()
+        for params in cube_searches(voter):
+            with self.subTest(**params):
+                search = VoterSearch(params)
+                voters = Voter.objects.filter(search.q())
+                summary = summary_queryset(search)
+                self.assertIsNotNone(summary)
+                self.assertEqual(summary.aggregate(total=Sum('count'))['total'] or 0, voters.count())
+
+                cache.clear()
+                self.assertEqual(search_chart_series(search), chart_series(voters))
+
+                # by birth year, only the citywide rows can answer
+                citywide = summary_queryset(search, by_birth_year=True)
+                if search.uses('zip_code', 'precinct_num'):
+                    self.assertIsNone(citywide)
+                else:
+                    self.assertEqual(chart_series(citywide), chart_series(voters))
+
+    def test_birth_year_by_area(self):
+        # the per-area rows have no birth year
+        self.assertIsNone(summary_queryset(VoterSearch({'min_dob': '1960'}), by_area=True))
+        self.assertIsNone(summary_queryset(VoterSearch({}), by_area=True, by_birth_year=True))
+
+
+@unittest.skipIf(np is None, 'the columnar engine needs NumPy')
+@override_settings(VOTER_COLUMNAR_ENGINE=True)
+class ColumnarEngineTests(TestCase):
+    '''The columnar engine finds, counts and charts the same voters as the
+    ORM, for every search parameter and for pairs of them.'''
+
+    @classmethod
+    def setUpTestData(cls):
+        load_synthetic(1000)
+        refresh_derived_tables()
+
+    def setUp(self):
+        # an engine loaded by another test may have the same data version
+        patcher = mock.patch('voter_analytics.columnar._engine', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        cache.clear()
+
+    def test_same_as_orm(self):
+        voter = Voter.objects.select_related(*LOOKUP_FIELDS).order_by('pk').first()
+        values = search_params(voter)
+        cases = plan_cases(values)
+        engine = columnar_engine()
+        self.assertIsNotNone(engine)
+
+        for name, params in cases:
+            with self.subTest(name):
+                search = VoterSearch(params)
+                voters = Voter.objects.filter(search.q())
+                pks = engine.matching_pks(search)
+                self.assertIsNotNone(pks)
+                self.assertEqual(pks.tolist(), list(voters.order_by('pk').values_list('pk', flat=True)))
+                self.assertEqual(engine.count(search), len(pks))
+                self.assertEqual(engine.chart_series(search), chart_series(voters))
+
+
+class ExportTests(TestCase):
+    '''The CSV and NDJSON exports have every matching voter once, in
+    primary key order, gzipped or not.'''
+
+    @classmethod
+    def setUpTestData(cls):
+        load_synthetic(1000)
+        refresh_derived_tables()
+
+    def export(self, params):
+        response = self.client.get('/voter_analytics/export', params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content)
+
+    def test_formats(self):
+        voter = Voter.objects.select_related(*LOOKUP_FIELDS).order_by('pk').first()
+        search = {'party_aff': voter.party_aff.code}
+        expected = list(Voter.objects.filter(VoterSearch(search).q())
+                                     .order_by('pk').values_list('voter_id', flat=True))
+        self.assertGreater(len(expected), 100)
+
+        # written a few rows at a time, so the rows span several pieces
+        with mock.patch('voter_analytics.export.EXPORT_ROWS_PER_WRITE', 7):
+            header, *rows = csv.reader(self.export(search).decode().splitlines())
+        self.assertEqual(header, EXPORT_FIELDS)
+        self.assertEqual([row[0] for row in rows], expected)
+        first = dict(zip(header, rows[0]))
+        self.assertEqual((first['last_name'], first['zip_code'], first['party_aff'], first['dob']),
+                         (voter.last_name, str(voter.zip_code.code), voter.party_aff.code,
+                          voter.dob.isoformat()))
+
+        lines = self.export({**search, 'format': 'ndjson'}).decode().splitlines()
+        self.assertEqual([json.loads(line)['voter_id'] for line in lines], expected)
+
+        self.assertEqual(gzip.decompress(self.export({**search, 'gzip': '1'})),
+                         self.export(search))
+
+    def test_unknown_format(self):
+        response = self.client.get('/voter_analytics/export', {'format': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+
+class HouseholdTests(TestCase):
+    '''Addresses typed differently get the same household key, and the
+    household page and voter pages list everyone at an address.'''
+
+    @classmethod
+    def setUpTestData(cls):
+        load_synthetic(1000)
+        refresh_derived_tables()
+
+    def test_key_normalization(self):
+        key = household_key(12, 'Beacon Street', 'Apt #2b', 2459)
+        for street, apartment in [('BEACON ST', '2B'), ('beacon  st.', 'Unit 2B'),
+                                  ('Beacon St', '#02-B'), ('BEACON STREET', 'APARTMENT 2B')]:
+            with self.subTest(street=street, apartment=apartment):
+                self.assertEqual(household_key(12, street, apartment, 2459), key)
+        self.assertNotEqual(household_key(12, 'Beacon Street', '3B', 2459), key)
+        self.assertNotEqual(household_key(14, 'Beacon Street', '2B', 2459), key)
+        self.assertNotEqual(household_key(12, 'Beacon Street', '2B', 2460), key)
+        self.assertNotEqual(household_key(12, 'Beacon Road', '2B', 2459), key)
+
+    def test_household_page(self):
+        # a second voter at the first one's address, typed another way
+        first, second = Voter.objects.select_related(*LOOKUP_FIELDS).order_by('pk')[:2]
+        key = household_key(first.street_num, first.street_name.name.lower(),
+                            f'Apt #{first.apt_num}', first.zip_code.code)
+        self.assertEqual(key, first.household_key)
+        Voter.objects.filter(pk=second.pk).update(household_key=key)
+        members = Voter.objects.filter(household_key=key)
+        self.assertGreater(members.count(), 1)
+        cache.clear()
+
+        response = self.client.get(reverse('household', args=[key]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({voter.pk for voter in response.context['results']},
+                         {voter.pk for voter in members})
+
+        # a voter's page lists the others at the address
+        voter = members.first()
+        response = self.client.get(reverse('voter', args=[voter.pk]))
+        self.assertEqual({other.pk for other in response.context['household']},
+                         {other.pk for other in members} - {voter.pk})
+
+        self.assertEqual(self.client.get(reverse('household', args=['nowhere'])).status_code, 404)
+
+
+class CrossTabTests(TestCase):
+    '''Cross-tabs, from the cube or from Voter, have the voters and turnout
+    of each group counted one voter at a time.'''
+
+    @classmethod
+    def setUpTestData(cls):
+        load_synthetic(1000)
+        refresh_derived_tables()
+
+    def expected(self, search, dimensions):
+        '''The cross-tab cells, grouped in Python.'''
+        groups = {}
+        for voter in Voter.objects.filter(search.q()).select_related(*LOOKUP_FIELDS):
+            values = {'party': voter.party_aff.code, 'decade': voter.dob.year // 10 * 10,
+                      'zip': voter.zip_code.code, 'precinct': voter.precinct_num.name,
+                      'score': voter.voter_score}
+            group = tuple(values[name] for name in dimensions)
+            voted = groups.setdefault(group, Counter())
+            voted['voters'] += 1
+            voted.update(election for election in ELECTION_FIELDS if getattr(voter, election))
+        return [{**dict(zip(dimensions, group)), 'voters': voted['voters'],
+                 'turnout': {election: round(voted[election] / voted['voters'], 4)
+                             for election in ELECTION_FIELDS}}
+                for group, voted in sorted(groups.items())]
+
+    def test_same_as_voters(self):
+        voter = Voter.objects.select_related(*LOOKUP_FIELDS).order_by('pk').first()
+        searches = [{}, {'party_aff': voter.party_aff.code}, {'voter_score': '2', 'v22general': 'on'},
+                    {'zip_code': str(voter.zip_code.code)}, {'min_dob': '1970'},
+                    {'first_name': voter.first_name}]
+        for params in searches:
+            for dimensions in (['party', 'decade'], ['score', 'party'], ['zip', 'precinct', 'score'],
+                               ['decade', 'zip']):
+                with self.subTest(params=params, dimensions=dimensions):
+                    search = VoterSearch(params)
+                    self.assertEqual(search_crosstab(search, dimensions),
+                                     self.expected(search, dimensions))
+
+    def test_bad_dimensions(self):
+        for dims in ('party', 'party,party', 'party,shoe_size'):
+            for url in ('/voter_analytics/crosstab', '/voter_analytics/api/crosstab'):
+                with self.subTest(url=url, dims=dims):
+                    self.assertEqual(self.client.get(url, {'dims': dims}).status_code, 400)
+
+
+class DetailCacheTests(TestCase):
+    '''A voter's page is served from the cache until the voter data moves
+    to a new version.'''
+
+    @classmethod
+    def setUpTestData(cls):
+        load_synthetic(100)
+        refresh_derived_tables()
+
+    def test_new_version_invalidates(self):
+        voter = Voter.objects.order_by('pk').first()
+        url = reverse('voter', args=[voter.pk])
+        cache.clear()
+        self.assertContains(self.client.get(url), voter.last_name)
+
+        Voter.objects.filter(pk=voter.pk).update(last_name='NEWNAME')
+        # cached: no queries, and the old name
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertNotContains(response, 'NEWNAME')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_data_version()
+        self.assertContains(self.client.get(url), 'NEWNAME')
+
+
+class ConditionalGetTests(TestCase):
+    '''The JSON views answer a request with a current ETag with a 304 and
+    no queries, and a bad request with a 400.'''
+
+    @classmethod
+    def setUpTestData(cls):
+        load_synthetic(100)
+        refresh_derived_tables()
+
+    def test_not_modified(self):
+        cache.clear()
+        for url, params in [('/voter_analytics/api/charts/party', {'party_aff': 'D'}),
+                            ('/voter_analytics/api/crosstab', {'dims': 'party,score'}),
+                            ('/voter_analytics/api/areas', {}),
+                            ('/voter_analytics/api/registrations', {'from': '2000-01'})]:
+            with self.subTest(url):
+                response = self.client.get(url, params)
+                self.assertEqual(response.status_code, 200)
+                etag = response['ETag']
+
+                with self.assertNumQueries(0):
+                    response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+
+                # another search has another ETag (the areas overview has no search)
+                response = self.client.get(url, {**params, 'voter_score': '1'},
+                                           HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304 if url.endswith('areas') else 200)
+
+    def test_new_version(self):
+        url = '/voter_analytics/api/charts/elections'
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_data_version()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_bad_requests(self):
+        for url, params in [('/voter_analytics/api/charts/shoe_size', {}),
+                            ('/voter_analytics/api/registrations', {'from': '2020-13'}),
+                            ('/voter_analytics/api/registrations', {'from': '2020-05', 'to': '2019-01'}),
+                            ('/voter_analytics/api/crosstab', {'dims': 'party'})]:
+            with self.subTest(url=url, params=params):
+                response = self.client.get(url, params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.json())
+                self.assertNotIn('ETag', response)
+
+
+@override_settings(VOTER_SAMPLE_THRESHOLD=0)
+class SampledChartTests(TestCase):
+    '''The 95% confidence intervals of the charts estimated from the voter
+    sample contain the true counts about 95% of the time, and an estimate
+    from a sample of everyone is exact.'''
+
+    @classmethod
+    def setUpTestData(cls):
+        load_synthetic(3000)
+        refresh_derived_tables()
+
+    def sampled(self, search, size):
+        rebuild_voter_sample(size, rng=random.Random(412))
+        cache.clear()
+        return sampled_chart_series(search)
+
+    def test_intervals_contain_counts(self):
+        inside = outside = 0
+        for params in ({}, {'party_aff': 'D'}, {'v20state': 'on'}, {'min_dob': '1960'}):
+            search = VoterSearch(params)
+            series = self.sampled(search, 600)
+            exact = chart_series(Voter.objects.filter(search.q()))
+            self.assertTrue(series['approximate'])
+            for name in ['party', 'elections', 'participation']:
+                for key, (low, high) in series['intervals'][name].items():
+                    if low <= exact[name].get(key, 0) <= high:
+                        inside += 1
+                    else:
+                        outside += 1
+        # short of 95%: a rare participation pattern with no sampled voters
+        # gets [0, 0], however many voters it has
+        self.assertGreaterEqual(inside / (inside + outside), 0.85)
+
+    def test_everyone_sampled(self):
+        search = VoterSearch({'party_aff': 'R'})
+        series = self.sampled(search, 3000)
+        exact = chart_series(Voter.objects.filter(search.q()))
+        for name in ['birth_year', 'party', 'elections', 'participation']:
+            self.assertEqual(series[name], exact[name])
+            self.assertEqual(list(series['intervals'][name].values()),
+                             [[count, count] for count in exact[name].values()])
+
+    @override_settings(VOTER_SAMPLE_THRESHOLD=100_000)
+    def test_narrow_search_not_sampled(self):
+        self.assertIsNone(self.sampled(VoterSearch({}), 600))
+
+
+class AreaRollupTests(TestCase):
+    '''The precinct and zip code overview, added up from the cube, has the
+    voters, party mix, mean score and turnout counted from Voter.'''
+
+    @classmethod
+    def setUpTestData(cls):
+        load_synthetic(1000)
+        refresh_derived_tables()
+
+    def test_same_as_voters(self):
+        cache.clear()
+        rollups = area_rollups()
+        names = {'precinct_num': 'precinct_num__name', 'zip_code': 'zip_code__code'}
+        for area in AREA_FIELDS:
+            with self.subTest(area):
+                rows = (Voter.objects.order_by(names[area]).values(names[area])
+                                     .annotate(voters=Count('pk'), mean_score=Avg('voter_score'),
+                                               **{election: Count('pk', filter=Q(**{election: True}))
+                                                  for election in ELECTION_FIELDS}))
+                self.assertEqual([rollup['name'] for rollup in rollups[area]],
+                                 [str(row[names[area]]) for row in rows])
+                for rollup, row in zip(rollups[area], rows):
+                    self.assertEqual(rollup['voters'], row['voters'])
+                    self.assertEqual(rollup['mean_score'], round(row['mean_score'], 2))
+                    turnout = {election: round(row[election] / row['voters'], 4)
+                               for election in ELECTION_FIELDS}
+                    self.assertEqual(rollup['turnout'], turnout)
+                    parties = (Voter.objects.filter(**{names[area]: row[names[area]]})
+                                            .values_list('party_aff__code').annotate(Count('pk')))
+                    self.assertEqual(rollup['parties'], dict(sorted(parties)))
+
+        self.assertEqual(self.client.get('/voter_analytics/areas').status_code, 200)
+
+
+class RegistrationTests(TestCase):
+    '''The registrations per month and running totals, from RegistrationDay
+    or from Voter, are the numbers of voters registered in and by the end
+    of each month.'''
+
+    @classmethod
+    def setUpTestData(cls):
+        load_synthetic(1000)
+        refresh_derived_tables()
+
+    def expected(self, voters, months, last):
+        '''(registrations in each month, registered by the end of it) of
+        the voters, up to the last day.'''
+        dates = voters.values_list('date_registration', flat=True)
+        per_month = Counter(day.strftime('%Y-%m') for day in dates if not last or day <= last)
+        monthly = [per_month[month] for month in months]
+        before = sum(count for month, count in per_month.items() if month < months[0])
+        return monthly, list(accumulate(monthly, initial=before))[1:]
+
+    def test_same_as_voters(self):
+        party = Voter.objects.select_related('party_aff').order_by('pk').first().party_aff.code
+        cache.clear()
+        for params in ({}, {'party_aff': party}, {'voter_score': '2'}):
+            for start, end in (('', ''), ('2000-03', '2010-06-15')):
+                for by_party in (False, True):
+                    with self.subTest(params=params, start=start, end=end, by_party=by_party):
+                        search = VoterSearch(params)
+                        first, last = parse_date_range(start, end)
+                        series = registration_series(search, first, last, by_party)
+                        self.assertTrue(series['months'])
+                        if first:
+                            self.assertEqual(series['months'][0], start)
+
+                        for label in series['cumulative']:
+                            voters = Voter.objects.filter(search.q())
+                            if by_party:
+                                voters = voters.filter(party_aff__code=label)
+                            self.assertEqual((series['monthly'][label], series['cumulative'][label]),
+                                             self.expected(voters, series['months'], last))
+
+    def test_chart_url(self):
+        party = Voter.objects.select_related('party_aff').order_by('pk').first().party_aff.code
+        response = self.client.get('/voter_analytics/graphs', {'party_aff': party, 'voter_score': '2'})
+        # the chart is of the party part of the search only
+        chart = response.context['registration_chart']
+        self.assertIn('party filter only', chart['title'])
+        data = self.client.get(chart['url']).json()
+        self.assertEqual(list(data['cumulative']), [party])
+        self.assertEqual(data['cumulative'][party][-1],
+                         Voter.objects.filter(party_aff__code=party).count())
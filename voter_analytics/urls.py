@@ -6,10 +6,24 @@
 from django.urls import path
 from django.conf import settings
 from .views import *
+from .async_views import AsyncGraphsView, AsyncVoterDetailView, AsyncVoterRecordsView
 
 # URL patterns for this app:
 urlpatterns = [
     path(r'', VoterRecordsListView.as_view(), name='voters'),
+    path(r'export', VoterExportView.as_view(), name='voter_export'),
     path(r'voter/<int:pk>', VoterDetailView.as_view(), name='voter'),
+    path(r'household/<str:key>', HouseholdView.as_view(), name='household'),
     path(r'graphs', GraphsView.as_view(), name='graphs'),
+    path(r'crosstab', CrossTabView.as_view(), name='crosstab'),
+    path(r'areas', AreaRollupView.as_view(), name='areas'),
+    path(r'api/charts/<str:series>', ChartDataView.as_view(), name='chart_data'),
+    path(r'api/crosstab', CrossTabDataView.as_view(), name='crosstab_data'),
+    path(r'api/areas', AreaRollupDataView.as_view(), name='areas_data'),
+    path(r'api/registrations', RegistrationDataView.as_view(), name='registration_data'),
+
+    # async versions of the pages, for serving under ASGI
+    path(r'async/', AsyncVoterRecordsView.as_view(), name='async_voters'),
+    path(r'async/voter/<int:pk>', AsyncVoterDetailView.as_view(), name='async_voter'),
+    path(r'async/graphs', AsyncGraphsView.as_view(), name='async_graphs'),
 ]
\ No newline at end of file
@@ -3,154 +3,239 @@
 # Friday, April 4, 2025
 # Description: views for the voter_analytics application
 
-from django.shortcuts import render
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import BadRequest
+from django.core.paginator import Paginator
+from django.http import (Http404, HttpResponse, HttpResponseBadRequest, JsonResponse,
+                         StreamingHttpResponse)
+from django.urls import reverse
+from django.utils.functional import cached_property
+from django.views.generic import DetailView, ListView, TemplateView, View
+
+from .charts import (CHART_SERIES, PLOTLY_JS, PLOTLY_TEMPLATE_JS, chart_figures,
+                     figures_cache_key, search_chart_series)
+from .columnar import columnar_engine
+from .counts import search_count
+from .crosstab import CROSSTAB_DIMENSIONS, parse_dimensions, search_crosstab
+from .dataversion import conditional_on_data_version, data_version
+from .export import EXPORT_FORMATS, export_stream
+from .filters import VoterSearch
+from .fulltext import ranked_pks
+from .lookups import LOOKUP_FIELDS
+from .models import Voter
+from .pagination import CachedCountPaginator, keyset_page
+from .registrations import parse_date_range, party_search, registration_series
+from .rollup import AREA_FIELDS, area_rollups
+from .voter_csv import ELECTION_FIELDS
+
+
+class VoterSearchMixin:
+    '''Filter the voters by the search form's GET parameters. Shared by the
+    voter list and graphs pages, so both use the same VoterSearch.'''
+
+    @cached_property
+    def search(self):
+        '''The VoterSearch for this request.'''
+        return VoterSearch(self.request.GET)
 
-# Create your views here.
-from django.db.models.query import QuerySet
-from django.shortcuts import render
-from django.views.generic import ListView, DetailView
-from . models import Voter
+    def get_queryset(self):
+        '''Start with the entire queryset and apply the whole search at once.'''
+        return super().get_queryset().filter(self.search.q())
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update(search_form_context(self.request.GET))
+        return context
+
+
+def search_form_context(params):
+    '''Context for the search form: the filter parameters, to retain them in
+    the form after submission, and the choice of birth years.'''
+    context = {}
+    for name in ['q', 'party_aff', 'dob', 'voter_score',
+                 'v20state', 'v21town', 'v21primary', 'v22general', 'v23town']:
+        context[name] = params.get(name, '')
+
+    years = list(range(1920, 2026))
+    context['years'] = years
+
+    return context
 
-# Import plotly library for graphing
-import plotly
-import plotly.offline as plotly
-import plotly.graph_objs as go
 
-from django.db import models
+def registration_chart(search):
+    '''Where the graphs page fetches its registration chart from (the JSON
+    API, when the chart is opened), and its title. Only the party filter of
+    the search applies, so the data always comes from RegistrationDay; the
+    title says when other filters were left out.'''
+    by_party = party_search(search)
+    query = urlencode([*by_party.items(), ('by_party', '1')])
+    note = ' (party filter only)' if by_party.key != search.key else ''
+    return {'url': f"{reverse('registration_data')}?{query}",
+            'title': 'Voter Registrations per Month' + note}
 
-class VoterRecordsListView(ListView):
+
+def filter_query(params):
+    '''The filter parameters of a voter list request, for the next/previous
+    page links (without the page, cursor and count parameters).'''
+    query = params.copy()
+    for name in ['page', 'cursor', 'count']:
+        query.pop(name, None)
+    return query.urlencode()
+
+class VoterRecordsListView(VoterSearchMixin, ListView):
     '''View to display voter records.'''
 
     template_name = 'voter_analytics/voter_records.html'
     model = Voter
+    queryset = Voter.objects.select_related(*LOOKUP_FIELDS) # lookups in the same query
     context_object_name = 'results'
     paginate_by = 100 # how many records per page
 
-    def get_queryset(self):
-        
-        # start with entire queryset
-        results = super().get_queryset()
-
-        # filter results by these field(s):
-        if 'first_name' in self.request.GET:
-            first_name = self.request.GET['first_name']
-            if first_name:
-                results = results.filter(first_name=first_name)
-        if 'last_name' in self.request.GET:
-            last_name = self.request.GET['last_name']
-            if last_name:
-                results = results.filter(last_name=last_name)
-        if 'street_num' in self.request.GET:
-            street_num = self.request.GET['street_num']
-            if street_num:
-                results = results.filter(street_num=street_num)
-        if 'street_name' in self.request.GET:
-            street_name = self.request.GET['street_name']
-            if street_name:
-                results = results.filter(street_name=street_name)
-        if 'apt_num' in self.request.GET:
-            apt_num = self.request.GET['apt_num']
-            if apt_num:
-                results = results.filter(apt_num=apt_num)
-        if 'zip_code' in self.request.GET:
-            zip_code = self.request.GET['zip_code']
-            if zip_code:
-                results = results.filter(zip_code=zip_code)
-        if 'dob' in self.request.GET:
-            dob = self.request.GET['dob']
-            if dob:
-                results = results.filter(dob=dob)
-
-        if 'min_dob' in self.request.GET and self.request.GET['min_dob']:
-            min_year = int(self.request.GET['min_dob'])
-            results = results.filter(dob__year__gte=min_year)
-
-        if 'max_dob' in self.request.GET and self.request.GET['max_dob']:
-            max_year = int(self.request.GET['max_dob'])
-            results = results.filter(dob__year__lte=max_year)
-
-        if 'party_aff' in self.request.GET:
-            party_aff = self.request.GET['party_aff']
-            if party_aff:
-                if party_aff == "not_rdu":
-                    results = results.exclude(party_aff__in=['R ', 'D ', 'U '])
-                else:
-                    results = results.filter(party_aff=party_aff)
-        if 'voter_score' in self.request.GET:
-            voter_score = self.request.GET['voter_score']
-            if voter_score:
-                results = results.filter(voter_score=voter_score)
-
-        if 'v20state' in self.request.GET:
-            v20state = self.request.GET['v20state']
-            if v20state.lower() == 'on':  # Checkbox checked
-                results = results.filter(v20state=True)
-            elif v20state.lower() == 'off': # Checkbox unchecked
-                results = results.filter(v20state=False)
-            
-        if 'v21town' in self.request.GET:
-            v21town = self.request.GET['v21town']
-            if v21town.lower() == 'on':  # Checkbox checked
-                results = results.filter(v21town=True)
-            elif v21town.lower() == 'off': # Checkbox unchecked
-                results = results.filter(v21town=False)
-
-        if 'v21primary' in self.request.GET:
-            v21primary = self.request.GET['v21primary']
-            if v21primary.lower() == 'on':  # Checkbox checked
-                results = results.filter(v21primary=True)
-            elif v21primary.lower() == 'off':  # Checkbox unchecked
-                results = results.filter(v21primary=False)
-
-        if 'v22general' in self.request.GET:
-            v22general = self.request.GET['v22general']
-            if v22general.lower() == 'on':  # Checkbox checked
-                results = results.filter(v22general=True)
-            elif v22general.lower() == 'off':  # Checkbox unchecked
-                results = results.filter(v22general=False)
-
-        if 'v23town' in self.request.GET:
-            v23town = self.request.GET['v23town']
-            if v23town.lower() == 'on':  # Checkbox checked
-                results = results.filter(v23town=True)
-            elif v23town.lower() == 'off':  # Checkbox unchecked
-                results = results.filter(v23town=False)
-                
-        return results
-    
+    def paginate_queryset(self, queryset, page_size):
+        '''Keep Django's numbered pages for old ?page= links; otherwise seek
+        through the results by primary key (keyset pagination), so a deep
+        page costs the same as page 1. Text searches (q) list the best
+        matches first instead.'''
+
+        if self.search.uses('q'):
+            ranked = ranked_pks(queryset, self.search.values['q'])
+            if ranked is not None:
+                return self.paginate_ranked(queryset, ranked, page_size)
+
+        if self.page_kwarg in self.request.GET:
+            return super().paginate_queryset(queryset.order_by('pk'), page_size)
+
+        # the columnar engine (if on) finds every match at once; otherwise
+        # small results reuse the cached primary keys of the search
+        engine = columnar_engine()
+        pks = engine.matching_pks(self.search) if engine is not None else None
+        if pks is None:
+            pks = self.search.matching_pks()
+        page = keyset_page(queryset, self.request.GET.get('cursor'), page_size, pks)
+
+        # counting every match is optional: count=1 for the exact (cached)
+        # number, count=estimate for a quick estimate on broad searches
+        if self.request.GET.get('count'):
+            estimate = self.request.GET['count'] == 'estimate'
+            page.count, page.count_estimated = search_count(queryset, self.search, estimate)
+
+        return (None, page, page.object_list, page.has_other_pages())
+
+    def paginate_ranked(self, queryset, ranked, page_size):
+        '''Numbered pages over the primary keys of a text search, in order
+        of relevance. There are at most VOTER_TEXT_SEARCH_LIMIT of them.'''
+        paginator = Paginator(ranked, page_size)
+        page = paginator.get_page(self.request.GET.get(self.page_kwarg))
+        voters = queryset.in_bulk(page.object_list)
+        page.object_list = [voters[pk] for pk in page.object_list]
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+    def get_paginator(self, queryset, per_page, orphans=0, allow_empty_first_page=True, **kwargs):
+        '''Numbered pages use the cached search count.'''
+        return CachedCountPaginator(queryset, per_page, search=self.search, orphans=orphans,
+                                    allow_empty_first_page=allow_empty_first_page, **kwargs)
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        # Pass the filter parameters to the context to retain them in the form after submission
-        context['party_aff'] = self.request.GET.get('party_aff', '')
-        context['dob'] = self.request.GET.get('dob', '')
-        context['voter_score'] = self.request.GET.get('voter_score', '')
-        context['v20state'] = self.request.GET.get('v20state', '')
-        context['v21town'] = self.request.GET.get('v21town', '')
-        context['v21primary'] = self.request.GET.get('v21primary', '')
-        context['v22general'] = self.request.GET.get('v22general', '')
-        context['v23town'] = self.request.GET.get('v23town', '')
-
-        years = list(range(1920, 2026))
-        context['years'] = years
+
+        # the filter parameters, for the next/previous page links
+        context['filter_query'] = filter_query(self.request.GET)
+        context['keyset'] = context['paginator'] is None
 
         return context
     
+class VoterExportView(VoterSearchMixin, ListView):
+    '''Download every voter matching the search as CSV (?format=csv, the
+    default) or NDJSON (?format=ndjson), streamed a chunk at a time so an
+    export of the whole city uses as little memory as one of 100 voters.
+    ?gzip=1 compresses the download on the fly.'''
+
+    model = Voter
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.GET.get('format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return HttpResponseBadRequest(f"No export format called {export_format}")
+        gzip = request.GET.get('gzip') == '1'
+
+        response = StreamingHttpResponse(export_stream(self.get_queryset(), export_format, gzip),
+                                         content_type=EXPORT_FORMATS[export_format])
+        response['Content-Disposition'] = f'attachment; filename="voters.{export_format}"'
+        if gzip:
+            response['Content-Encoding'] = 'gzip'
+        return response
+
+
+def detail_cache_key(version, pk):
+    '''Where the rendered detail page of a voter is cached.'''
+    return f'voter_analytics:detail:{version}:{pk}'
+
+
 class VoterDetailView(DetailView):
     '''Display the voter record for a single person.'''
 
     model = Voter
+    queryset = Voter.objects.select_related(*LOOKUP_FIELDS)
     context_object_name = 'r' #short for record
     template_name = 'voter_analytics/record_detail.html'
 
+    def get(self, request, *args, **kwargs):
+        '''Records only change when a voter file is loaded, so the rendered
+        page is cached per voter and data version. A cache hit needs no
+        query (beyond the data version, itself cached) and no rendering.'''
+        version, loaded_at = data_version()
+        cache_key = detail_cache_key(version, kwargs['pk'])
+
+        content = cache.get(cache_key)
+        if content is not None:
+            return HttpResponse(content)
+
+        response = super().get(request, *args, **kwargs)
+        response.render()
+        cache.set(cache_key, response.content, settings.VOTER_DETAIL_CACHE_TTL)
+        return response
+
     def get_context_data(self, **kwargs) :
         '''Provide context variables for use in template'''
         # start with superclass context
         context = super().get_context_data(**kwargs)
         r = context['r']
 
+        # everyone else at the same address, with one lookup on the household index
+        context['household'] = household_members(r.household_key).exclude(pk=r.pk)
+
+        return context
+
+
+def household_members(key):
+    '''The voters living at the address with this household key.'''
+    if not key:
+        return Voter.objects.none()
+    return (Voter.objects.select_related(*LOOKUP_FIELDS)
+                         .filter(household_key=key).order_by('last_name', 'first_name'))
+
+
+class HouseholdView(ListView):
+    '''Display every voter living at one address.'''
+
+    model = Voter
+    context_object_name = 'results'
+    template_name = 'voter_analytics/household.html'
+
+    def get_queryset(self):
+        return household_members(self.kwargs['key'])
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        if not context['results']:
+            raise Http404("No voters at this address")
+        context['address'] = context['results'][0]
         return context
     
-class GraphsView(ListView):
+class GraphsView(VoterSearchMixin, ListView):
     model = Voter
     template_name = 'voter_analytics/graphs.html'
     context_object_name = 'voters'
@@ -160,179 +245,173 @@ class GraphsView(ListView):
         
         context = super().get_context_data(**kwargs)
 
-        results = self.get_queryset()
+        # the figures only change with the search and the voter data
+        version, loaded_at = data_version()
+        cache_key = figures_cache_key(version, self.search)
+        figures = cache.get(cache_key)
 
-        # Pass the filter parameters to the context to retain them in the form after submission
-        context['party_aff'] = self.request.GET.get('party_aff', '')
-        context['dob'] = self.request.GET.get('dob', '')
-        context['voter_score'] = self.request.GET.get('voter_score', '')
-        context['v20state'] = self.request.GET.get('v20state', '')
-        context['v21town'] = self.request.GET.get('v21town', '')
-        context['v21primary'] = self.request.GET.get('v21primary', '')
-        context['v22general'] = self.request.GET.get('v22general', '')
-        context['v23town'] = self.request.GET.get('v23town', '')
+        if figures is None:
+            figures = chart_figures(search_chart_series(self.search))
+            cache.set(cache_key, figures, settings.VOTER_FIGURE_CACHE_TTL)
 
-        years = list(range(1920, 2026))
-        context['years'] = years
+        # only the figure data goes into the page; the browser draws it with
+        # long-cached static copies of plotly.js and of the figure template
+        context['figures'] = figures
+        context['plotly_js'] = PLOTLY_JS
+        context['plotly_template_js'] = PLOTLY_TEMPLATE_JS
+        context['registration_chart'] = registration_chart(self.search)
 
-        # 1. Histogram: Distribution of Voters by Birth Year
-        birth_years = results.values_list('dob', flat=True)
-        birth_years = [dob.year for dob in birth_years]
+        return context
 
-        birth_year_counts = {}
-        for year in birth_years:
-            birth_year_counts[year] = birth_year_counts.get(year, 0) + 1
 
-        x = list(birth_year_counts.keys())
-        y = list(birth_year_counts.values())
+def chart_data_key(request, series):
+    '''The chart data only changes with the series and the search (and the
+    voter data).'''
+    if series not in CHART_SERIES:
+        raise ValueError(f'no chart called {series}')
+    return f'{series}-{VoterSearch(request.GET).key}'
 
-        fig_birth_year = go.Bar(x=x, y=y, name='Voters by Birth Year')
-        title_birth_year = 'Distribution of Voters by Birth Year'
 
-        graph_div_birth_year = plotly.plot({
-            'data': [fig_birth_year],
-            'layout': {'title': title_birth_year}
-        }, auto_open=False, output_type='div')
+@conditional_on_data_version(chart_data_key)
+class ChartDataView(View):
+    '''JSON data for one of the charts on the graphs page (birth_year,
+    party, elections or participation), for the voters matching the GET
+    parameters.'''
 
-        context['graph_div_birth_year'] = graph_div_birth_year
+    def get(self, request, series):
+        all_series = search_chart_series(VoterSearch(request.GET))
+        counts = all_series[series]
+        version, loaded_at = data_version()
 
-        # 2. Pie Chart: Distribution of Voters by Party Affiliation
-        party_affiliations = results.values_list('party_aff', flat=True)
-        party_counts = {}
-        for party in party_affiliations:
-            party_counts[party] = party_counts.get(party, 0) + 1
+        data = {
+            'series': series,
+            'version': version,
+            'x': list(counts.keys()),
+            'y': list(counts.values()),
+            'approximate': all_series.get('approximate', False),
+        }
+        if data['approximate']:
+            # 95% confidence interval of each estimate, as [low, high]
+            data['intervals'] = list(all_series['intervals'][series].values())
+        return JsonResponse(data)
 
-        labels = list(party_counts.keys())
-        values = list(party_counts.values())
 
-        fig_party_affiliation = go.Pie(labels=labels, values=values, name='Voters by Party Affiliation')
-        title_party_affiliation = 'Distribution of Voters by Party Affiliation'
+def registration_range(request):
+    '''The ?from= and ?to= dates of a registration request (YYYY-MM-DD or
+    YYYY-MM). Raises ValueError for anything else.'''
+    return parse_date_range(request.GET.get('from', ''), request.GET.get('to', ''))
 
-        graph_div_party_affiliation = plotly.plot({
-            'data': [fig_party_affiliation],
-            'layout': {'title': title_party_affiliation}
-        }, auto_open=False, output_type='div')
 
-        context['graph_div_party_affiliation'] = graph_div_party_affiliation
-        
-        # 3. Histogram: Distribution of Voters by Election Participation
-        election_participation = {
-            'v20state': 0,
-            'v21town': 0,
-            'v21primary': 0,
-            'v22general': 0,
-            'v23town': 0
-        }
+def registration_key(request):
+    '''Registrations only change with the range and the search (and the
+    voter data).'''
+    start, end = registration_range(request)
+    by_party = 'party' if request.GET.get('by_party') else 'all'
+    return f'{start}-{end}-{by_party}-{VoterSearch(request.GET).key}'
 
-        voters = results.all()
-        for voter in voters:
-            for election in election_participation.keys():
-                if getattr(voter, election, False):
-                    election_participation[election] += 1
 
-        x_elections = list(election_participation.keys())
-        y_elections = list(election_participation.values())
+@conditional_on_data_version(registration_key)
+class RegistrationDataView(View):
+    '''JSON registrations per month and running totals of the voters
+    matching the search, between ?from= and ?to=, per party with ?by_party=1.'''
 
-        fig_election_participation = go.Bar(x=x_elections, y=y_elections, name='Voter Participation in Elections')
-        title_election_participation = 'Distribution of Voters by Election Participation'
+    def get(self, request):
+        start, end = registration_range(request)
+        version, loaded_at = data_version()
+        series = registration_series(VoterSearch(request.GET), start, end,
+                                     by_party=bool(request.GET.get('by_party')))
+        return JsonResponse({'version': version, **series})
 
-        graph_div_election_participation = plotly.plot({
-            'data': [fig_election_participation],
-            'layout': {'title': title_election_participation}
-        }, auto_open=False, output_type='div')
 
-        context['graph_div_election_participation'] = graph_div_election_participation
+def crosstab_dimensions(request):
+    '''The ?dims= of a cross-tab request (party and birth decade by
+    default). Raises ValueError for dimensions we don't have.'''
+    return parse_dimensions(request.GET.get('dims', 'party,decade'))
+
+
+class CrossTabView(VoterSearchMixin, TemplateView):
+    '''Turnout cross-tab of the voters matching the search: counts and
+    turnout rates grouped by two or three dimensions (?dims=party,decade).'''
+
+    template_name = 'voter_analytics/crosstab.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+
+        try:
+            dimensions = crosstab_dimensions(self.request)
+        except ValueError as e:
+            raise BadRequest(str(e))
+        context['dimensions'] = dimensions
+        context['elections'] = ELECTION_FIELDS
+        # one table row per cell: its dimension values, voters and turnout rates
+        context['rows'] = [([cell[name] for name in dimensions], cell['voters'],
+                            [cell['turnout'][election] for election in ELECTION_FIELDS])
+                           for cell in search_crosstab(self.search, dimensions)]
+        context['dimension_choices'] = list(CROSSTAB_DIMENSIONS)
+
+        # the filter parameters, to keep them when the dimensions change
+        # (every value of the ones given more than once, like voted_exactly)
+        query = self.request.GET.copy()
+        query.pop('dims', None)
+        context['filters'] = [(name, value) for name, values in query.lists() for value in values]
 
         return context
-    
-    def get_queryset(self):
-        
-        # start with entire queryset
-        results = super().get_queryset()
-
-        # filter results by these field(s):
-        if 'first_name' in self.request.GET:
-            first_name = self.request.GET['first_name']
-            if first_name:
-                results = results.filter(first_name=first_name)
-        if 'last_name' in self.request.GET:
-            last_name = self.request.GET['last_name']
-            if last_name:
-                results = results.filter(last_name=last_name)
-        if 'street_num' in self.request.GET:
-            street_num = self.request.GET['street_num']
-            if street_num:
-                results = results.filter(street_num=street_num)
-        if 'street_name' in self.request.GET:
-            street_name = self.request.GET['street_name']
-            if street_name:
-                results = results.filter(street_name=street_name)
-        if 'apt_num' in self.request.GET:
-            apt_num = self.request.GET['apt_num']
-            if apt_num:
-                results = results.filter(apt_num=apt_num)
-        if 'zip_code' in self.request.GET:
-            zip_code = self.request.GET['zip_code']
-            if zip_code:
-                results = results.filter(zip_code=zip_code)
-        if 'dob' in self.request.GET:
-            dob = self.request.GET['dob']
-            if dob:
-                results = results.filter(dob=dob)
-
-        if 'min_dob' in self.request.GET and self.request.GET['min_dob']:
-            min_year = int(self.request.GET['min_dob'])
-            results = results.filter(dob__year__gte=min_year)
-
-        if 'max_dob' in self.request.GET and self.request.GET['max_dob']:
-            max_year = int(self.request.GET['max_dob'])
-            results = results.filter(dob__year__lte=max_year)
-
-        if 'party_aff' in self.request.GET:
-            party_aff = self.request.GET['party_aff']
-            if party_aff:
-                if party_aff == "not_rdu":
-                    results = results.exclude(party_aff__in=['R ', 'D ', 'U '])
-                else:
-                    results = results.filter(party_aff=party_aff)
-        if 'voter_score' in self.request.GET:
-            voter_score = self.request.GET['voter_score']
-            if voter_score:
-                results = results.filter(voter_score=voter_score)
-
-        if 'v20state' in self.request.GET:
-            v20state = self.request.GET['v20state']
-            if v20state.lower() == 'on':  # Checkbox checked
-                results = results.filter(v20state=True)
-            elif v20state.lower() == 'off': # Checkbox unchecked
-                results = results.filter(v20state=False)
-            
-        if 'v21town' in self.request.GET:
-            v21town = self.request.GET['v21town']
-            if v21town.lower() == 'on':  # Checkbox checked
-                results = results.filter(v21town=True)
-            elif v21town.lower() == 'off': # Checkbox unchecked
-                results = results.filter(v21town=False)
-
-        if 'v21primary' in self.request.GET:
-            v21primary = self.request.GET['v21primary']
-            if v21primary.lower() == 'on':  # Checkbox checked
-                results = results.filter(v21primary=True)
-            elif v21primary.lower() == 'off':  # Checkbox unchecked
-                results = results.filter(v21primary=False)
-
-        if 'v22general' in self.request.GET:
-            v22general = self.request.GET['v22general']
-            if v22general.lower() == 'on':  # Checkbox checked
-                results = results.filter(v22general=True)
-            elif v22general.lower() == 'off':  # Checkbox unchecked
-                results = results.filter(v22general=False)
-
-        if 'v23town' in self.request.GET:
-            v23town = self.request.GET['v23town']
-            if v23town.lower() == 'on':  # Checkbox checked
-                results = results.filter(v23town=True)
-            elif v23town.lower() == 'off':  # Checkbox unchecked
-                results = results.filter(v23town=False)
-                
-        return results
\ No newline at end of file
+
+
+def crosstab_key(request):
+    '''A cross-tab only changes with its dimensions and the search (and the
+    voter data).'''
+    dimensions = '.'.join(crosstab_dimensions(request)) # no commas: they split ETag lists
+    return f'{dimensions}-{VoterSearch(request.GET).key}'
+
+
+@conditional_on_data_version(crosstab_key)
+class CrossTabDataView(View):
+    '''The cross-tab of CrossTabView as JSON.'''
+
+    def get(self, request):
+        dimensions = crosstab_dimensions(request)
+        version, loaded_at = data_version()
+
+        return JsonResponse({
+            'dimensions': dimensions,
+            'version': version,
+            'cells': search_crosstab(VoterSearch(request.GET), dimensions),
+        })
+
+
+class AreaRollupView(TemplateView):
+    '''Overview of every precinct and zip code: voters, party mix, mean
+    voter score and turnout in each election, read from AreaRollup.'''
+
+    template_name = 'voter_analytics/areas.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+
+        rollups = area_rollups()
+        parties = sorted({party for area in AREA_FIELDS for rollup in rollups[area]
+                          for party in rollup['parties']})
+        context['parties'] = parties
+        context['elections'] = ELECTION_FIELDS
+        # one table per kind of area, one row per area, in the order of the columns
+        titles = {'precinct_num': 'Precincts', 'zip_code': 'Zip codes'}
+        context['tables'] = [
+            (titles[area], area, [(rollup['name'], rollup['voters'],
+                     [rollup['parties'].get(party, 0) / rollup['voters'] for party in parties],
+                     rollup['mean_score'],
+                     [rollup['turnout'][election] for election in ELECTION_FIELDS])
+                    for rollup in rollups[area]])
+            for area in AREA_FIELDS
+        ]
+        return context
+
+
+@conditional_on_data_version(lambda request: 'areas') # only the voter data changes it
+class AreaRollupDataView(View):
+    '''The precinct and zip code overview of AreaRollupView as JSON.'''
+
+    def get(self, request):
+        version, loaded_at = data_version()
+        return JsonResponse({'version': version, **area_rollups()})
@@ -0,0 +1,147 @@
+# voter_analytics/voter_csv.py
+# Made by Annelise Schreiber, aschreib@bu.edu
+# Sunday, October 18, 2026
+# Description: parsing the voter CSV file. Nothing here touches Django, so
+# these functions can run in worker processes of the parallel loader.
+
+import csv
+import hashlib
+import io
+import os
+import re
+from datetime import date
+
+# the five election participation columns, in CSV order
+ELECTION_FIELDS = ['v20state', 'v21town', 'v21primary', 'v22general', 'v23town']
+
+# how many ways there are to vote in some of them (see participation_mask)
+PARTICIPATION_PATTERNS = 1 << len(ELECTION_FIELDS)
+
+
+def parse_date(value):
+    '''Convert a YYYY-MM-DD string from the CSV file into a date.'''
+    # much faster than datetime.strptime for this one fixed format
+    return date.fromisoformat(value.strip())
+
+
+def parse_flag(value):
+    '''Convert a TRUE/FALSE string from the CSV file into a boolean.'''
+    return value.strip().upper() == 'TRUE'
+
+
+def participation_mask(elections):
+    '''Election participation as one small number: bit i is set when the
+    voter took part in ELECTION_FIELDS[i] (so 0-31). elections is the set
+    of election names voted in.'''
+    return sum(1 << bit for bit, election in enumerate(ELECTION_FIELDS) if election in elections)
+
+
+def row_fingerprint(fields):
+    '''Hash the content columns of a CSV row, so a changed record can be
+    spotted without comparing every field.'''
+    content = '\x1f'.join(fields[1:17]).encode()
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+# long street suffixes, and the short form the voter file mostly uses
+STREET_SUFFIXES = {'STREET': 'ST', 'AVENUE': 'AVE', 'ROAD': 'RD', 'TERRACE': 'TER',
+                   'PLACE': 'PL', 'CIRCLE': 'CIR', 'LANE': 'LN', 'DRIVE': 'DR',
+                   'COURT': 'CT', 'BOULEVARD': 'BLVD', 'PARKWAY': 'PKWY', 'SQUARE': 'SQ'}
+
+# words that may come before an apartment number ("Apt 2", "Unit #3", "No. 5")
+APARTMENT_PREFIX = re.compile(r'^(APARTMENT|APT|UNIT|NO(?=[\s.#\d])|#)')
+
+
+def household_key(street_num, street_name, apt_num, zip_code):
+    '''One string for everyone living at an address, however the address
+    was typed: "12 Beacon Street, Apt #2b" and "12 BEACON ST 2B" in the
+    same zip code get the same key.'''
+    words = re.sub(r'[^A-Z0-9]+', ' ', street_name.upper()).split()
+    street = ' '.join(STREET_SUFFIXES.get(word, word) for word in words)
+
+    apartment = APARTMENT_PREFIX.sub('', (apt_num or '').upper().strip())
+    apartment = re.sub(r'[^A-Z0-9]+', '', apartment).lstrip('0')
+
+    return f'{zip_code:05d}|{street_num}|{street}|{apartment}'
+
+
+def parse_row(fields):
+    '''Convert one row of the CSV file (a list of strings) into a dict of
+    Voter field values. Raises IndexError or ValueError for a bad row.'''
+    street_num, zip_code = int(fields[3]), int(fields[6])
+    voted = {election for election, flag in zip(ELECTION_FIELDS, fields[11:16]) if parse_flag(flag)}
+    return dict(voter_id = fields[0].strip(),
+                first_name = fields[2],
+                last_name = fields[1],
+                street_num = street_num,
+                street_name = fields[4],
+                apt_num = fields[5],
+                zip_code = zip_code,
+                dob = parse_date(fields[7]),
+                date_registration = parse_date(fields[8]),
+                party_aff = fields[9],
+                precinct_num = fields[10],
+                v20state = 'v20state' in voted,
+                v21town = 'v21town' in voted,
+                v21primary = 'v21primary' in voted,
+                v22general = 'v22general' in voted,
+                v23town = 'v23town' in voted,
+                voter_score = int(fields[16]),
+                participation = participation_mask(voted),
+                household_key = household_key(street_num, fields[4], fields[5], zip_code),
+                row_hash = row_fingerprint(fields))
+
+
+# order of the values in the plain tuples the parallel parser passes around
+ROW_FIELDS = ['voter_id', 'first_name', 'last_name', 'street_num', 'street_name',
+              'apt_num', 'zip_code', 'dob', 'date_registration', 'party_aff',
+              'precinct_num', *ELECTION_FIELDS, 'voter_score', 'participation',
+              'household_key', 'row_hash']
+
+
+def chunk_ranges(filename, chunks):
+    '''Split the data rows of the CSV file (everything after the header)
+    into about `chunks` byte ranges, each starting and ending on a line
+    boundary. Assumes no quoted field contains a newline, which holds for
+    the voter file.'''
+
+    size = os.path.getsize(filename)
+    with open(filename, 'rb') as f:
+        f.readline() #skip headers
+        start = f.tell()
+
+        boundaries = [start]
+        for i in range(1, chunks):
+            offset = start + (size - start) * i // chunks
+            if offset <= boundaries[-1]:
+                continue
+            # move forward to the start of the next line
+            f.seek(offset - 1)
+            f.readline()
+            if boundaries[-1] < f.tell() < size:
+                boundaries.append(f.tell())
+        boundaries.append(size)
+
+    return [(filename, boundaries[i], boundaries[i + 1]) for i in range(len(boundaries) - 1)]
+
+
+def parse_chunk(chunk):
+    '''Parse one (filename, start, end) byte range of the CSV file.
+    Returns (rows, errors, line_count): rows as plain tuples in ROW_FIELDS
+    order, errors as (line within chunk, raw row, message).'''
+
+    filename, start, end = chunk
+    with open(filename, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+
+    reader = csv.reader(io.StringIO(data.decode(), newline=''))
+    rows = []
+    errors = []
+    for row in reader:
+        try:
+            rows.append(tuple(parse_row(row).values()))
+        except (IndexError, ValueError) as e:
+            errors.append((reader.line_num, row, str(e)))
+
+    return rows, errors, reader.line_num